@@ -5,7 +5,50 @@ Quick access to all experimental tools
 
 import os
 import sys
-import subprocess
+import importlib
+import traceback
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulations", "scripts")
+
+# Simulation modules imported so far, keyed by script name
+_loaded_scripts = {}
+
+def load_script(name):
+    """Import a simulation script in-process, reusing it on repeat runs"""
+    if name not in _loaded_scripts:
+        if not os.path.exists(os.path.join(SCRIPTS_DIR, name + ".py")):
+            raise FileNotFoundError(name + ".py")
+        if SCRIPTS_DIR not in sys.path:
+            sys.path.insert(0, SCRIPTS_DIR)
+        _loaded_scripts[name] = importlib.import_module(name)
+    return _loaded_scripts[name]
+
+def run_script(name, success_msg, not_found_msg, failure_msg):
+    """Run a simulation script's main() in-process, printing the traceback if it fails"""
+    try:
+        try:
+            script = load_script(name)
+        except FileNotFoundError:
+            print(not_found_msg)
+            return
+        # Scripts parse sys.argv; give them their own, not the launcher's
+        launcher_argv, sys.argv = sys.argv, [name + ".py"]
+        try:
+            script.main()
+        finally:
+            sys.argv = launcher_argv
+        if success_msg:
+            print(success_msg)
+    except Exception:
+        traceback.print_exc()
+        print(failure_msg)
+    finally:
+        pause()
+
+def pause():
+    """Wait for Enter, but only when a user is at the terminal"""
+    if sys.stdin.isatty():
+        input("Press Enter to continue...")
 
 def print_header():
     print("""
@@ -61,18 +104,9 @@ Enter choice (0-6): """, end="")
 
         choice = input().strip()
         
-        if choice == "1":
-            run_heat_simulation()
-        elif choice == "2":
-            run_pressure_analysis()
-        elif choice == "3":
-            run_lattice_generator()
-        elif choice == "4":
-            run_installation_check()
-        elif choice == "5":
-            launch_jupyter()
-        elif choice == "6":
-            open_results_folder()
+        action = MENU_ACTIONS.get(choice)
+        if action:
+            action()
         elif choice == "0":
             print("\n👋 Goodbye! Happy experimenting!")
             break
@@ -85,16 +119,10 @@ def run_heat_simulation():
     print("This will run GPU-accelerated heat diffusion simulations")
     print("comparing different micro-chamber sizes.\n")
     
-    try:
-        subprocess.run([sys.executable, "heat_solver_gpu.py"], check=True)
-        print("\n✅ Heat simulation completed successfully!")
-        input("Press Enter to continue...")
-    except subprocess.CalledProcessError:
-        print("❌ Heat simulation failed. Check installation.")
-        input("Press Enter to continue...")
-    except FileNotFoundError:
-        print("❌ heat_solver_gpu.py not found. Ensure you're in the correct directory.")
-        input("Press Enter to continue...")
+    run_script("heat_solver_gpu",
+               "\n✅ Heat simulation completed successfully!",
+               "❌ heat_solver_gpu.py not found. Ensure you're in the correct directory.",
+               "❌ Heat simulation failed. Check installation.")
 
 def run_pressure_analysis():
     """Launch pressure drop analysis"""
@@ -102,16 +130,10 @@ def run_pressure_analysis():
     print("This will analyze flow characteristics of honeycomb lattices")
     print("using Hagen-Poiseuille equations.\n")
     
-    try:
-        subprocess.run([sys.executable, "pressure_drop_analysis.py"], check=True)
-        print("\n✅ Pressure analysis completed successfully!")
-        input("Press Enter to continue...")
-    except subprocess.CalledProcessError:
-        print("❌ Pressure analysis failed. Check installation.")
-        input("Press Enter to continue...")
-    except FileNotFoundError:
-        print("❌ pressure_drop_analysis.py not found.")
-        input("Press Enter to continue...")
+    run_script("pressure_drop_analysis",
+               "\n✅ Pressure analysis completed successfully!",
+               "❌ pressure_drop_analysis.py not found.",
+               "❌ Pressure analysis failed. Check installation.")
 
 def run_lattice_generator():
     """Launch 3D lattice generator"""
@@ -119,31 +141,20 @@ def run_lattice_generator():
     print("This will create hexagonal honeycomb structures")
     print("and export STL files for 3D printing.\n")
     
-    try:
-        subprocess.run([sys.executable, "lattice_generator.py"], check=True)
-        print("\n✅ Lattice generation completed successfully!")
-        input("Press Enter to continue...")
-    except subprocess.CalledProcessError:
-        print("❌ Lattice generation failed. Check installation.")
-        input("Press Enter to continue...")
-    except FileNotFoundError:
-        print("❌ lattice_generator.py not found.")
-        input("Press Enter to continue...")
+    run_script("lattice_generator",
+               "\n✅ Lattice generation completed successfully!",
+               "❌ lattice_generator.py not found.",
+               "❌ Lattice generation failed. Check installation.")
 
 def run_installation_check():
     """Run installation diagnostics"""
     print("\n🧪 Running Installation Check...")
     print("This will verify all components are properly installed.\n")
     
-    try:
-        subprocess.run([sys.executable, "installation_check.py"], check=True)
-        input("Press Enter to continue...")
-    except subprocess.CalledProcessError:
-        print("❌ Installation check failed.")
-        input("Press Enter to continue...")
-    except FileNotFoundError:
-        print("❌ installation_check.py not found.")
-        input("Press Enter to continue...")
+    run_script("installation_check",
+               None,
+               "❌ installation_check.py not found.",
+               "❌ Installation check failed.")
 
 def launch_jupyter():
     """Launch Jupyter notebook"""
@@ -151,33 +162,49 @@ def launch_jupyter():
     print("This will open the interactive analysis environment.")
     print("You can create custom experiments and visualizations.\n")
     
+    import subprocess
     try:
         print("Starting Jupyter server...")
         subprocess.run(["jupyter", "notebook"], check=True)
     except subprocess.CalledProcessError:
         print("❌ Failed to launch Jupyter. Check installation.")
-        input("Press Enter to continue...")
+        pause()
     except FileNotFoundError:
         print("❌ Jupyter not found. Install with: pip install jupyter")
-        input("Press Enter to continue...")
+        pause()
 
 def open_results_folder():
     """Open results folder in file explorer"""
     print("\n📁 Opening results folder...")
     
+    current_dir = os.getcwd()
     try:
-        current_dir = os.getcwd()
-        subprocess.run(["explorer", current_dir], check=True)
-        print("✅ Results folder opened in Windows Explorer")
-        input("Press Enter to continue...")
-    except subprocess.CalledProcessError:
+        if sys.platform == "win32":
+            os.startfile(current_dir)  # ShellExecute, no child process
+        else:
+            import subprocess
+            opener = "open" if sys.platform == "darwin" else "xdg-open"
+            subprocess.Popen([opener, current_dir])
+        print("✅ Results folder opened in file explorer")
+        pause()
+    except OSError:
         print("❌ Failed to open folder.")
-        print(f"Manual path: {os.getcwd()}")
-        input("Press Enter to continue...")
+        print(f"Manual path: {current_dir}")
+        pause()
+
+MENU_ACTIONS = {
+    "1": run_heat_simulation,
+    "2": run_pressure_analysis,
+    "3": run_lattice_generator,
+    "4": run_installation_check,
+    "5": launch_jupyter,
+    "6": open_results_folder,
+}
 
 if __name__ == "__main__":
     try:
-        print_header()
+        if sys.stdout.isatty():
+            print_header()
         main_menu()
     except KeyboardInterrupt:
         print("\n\n👋 Interrupted by user. Goodbye!")
@@ -4,9 +4,103 @@ LaTeX Debug Helper - Identifies common compilation issues
 
 import os
 import re
+import bisect
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
-def check_files():
+GRAPHIC_EXTENSIONS = ['', '.png', '.pdf', '.jpg', '.eps']
+MAX_IO_WORKERS = 16
+MAX_TEX_BYTES = 5 * 1024 * 1024  # Larger files are generated, not hand-written
+
+_INPUT_RE = re.compile(r'\\(?:input|include)\{([^}]+)\}')
+_GRAPHICS_RE = re.compile(r'\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}')
+_USEPACKAGE_RE = re.compile(r'\\usepackage(?:\[[^\]]*\])?\{([^}]+)\}')
+_UNESC_DOLLAR = re.compile(r'(?<!\\)\$')
+_UNESC_UNDERSCORE = re.compile(r'(?<!\\)_')
+_ESCAPED_BRACE = re.compile(r'\\[{}]')
+
+@functools.lru_cache(maxsize=4096)
+def _exists(path):
+    """Cached os.path.exists - referenced files are checked repeatedly."""
+    return os.path.exists(path)
+
+@functools.lru_cache(maxsize=None)
+def _dir_entries(dirname):
+    """Names in a directory, listed once with a single scandir."""
+    try:
+        with os.scandir(dirname or '.') as it:
+            return frozenset(entry.name for entry in it)
+    except OSError:
+        return frozenset()
+
+@functools.lru_cache(maxsize=None)
+def _read_tex(path):
+    """Read a .tex file once; later checks reuse the cached text."""
+    return Path(path).read_text(encoding='utf-8')
+
+def _section_files():
+    """Paths of the .tex files in sections/."""
+    with os.scandir("sections") as it:
+        return [entry.path for entry in it if entry.name.endswith(".tex") and entry.is_file()]
+
+def _probe_graphic(graphic):
+    """Return the first existing file for a graphic reference, or None.
+
+    The directory listing is only a fast path: names it misses still go through
+    os.path.exists, which matches case-insensitively on Windows and macOS.
+    """
+    dirname, basename = os.path.split(graphic)
+    entries = _dir_entries(dirname)
+    for ext in GRAPHIC_EXTENSIONS:
+        if basename + ext in entries or _exists(graphic + ext):
+            return graphic + ext
+    return None
+
+@dataclass
+class DocState:
+    """Document text and regex matches, gathered in one pass over each file."""
+    tex_files: list   # main.tex first, then sections
+    syntax_files: list  # tex_files small enough for the syntax checks
+    contents: dict    # path -> file text
+    lines: dict       # path -> content.splitlines(), for syntax_files
+    inputs: list      # \input/\include targets in main.tex
+    graphics: list    # \includegraphics targets across all files
+    packages: list    # \usepackage names in main.tex
+
+def load_document():
+    """Read main.tex and the section files once and run every regex scan."""
+    if not _exists("main.tex"):
+        return None
+    
+    tex_files = ["main.tex"] + _section_files()
+    # Oversized section files skip only the syntax checks; main.tex is always checked
+    syntax_files = ["main.tex"]
+    for tex_file in tex_files[1:]:
+        if os.path.getsize(tex_file) > MAX_TEX_BYTES:
+            print(f"  ⚠ Skipping syntax checks for {tex_file} - over {MAX_TEX_BYTES // (1024 * 1024)} MB, likely generated")
+            continue
+        syntax_files.append(tex_file)
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as ex:
+        contents = dict(zip(tex_files, ex.map(_read_tex, tex_files)))
+    
+    main_content = contents["main.tex"]
+    graphics = []
+    for tex_file in tex_files:
+        graphics.extend(_GRAPHICS_RE.findall(contents[tex_file]))
+    
+    return DocState(
+        tex_files=tex_files,
+        syntax_files=syntax_files,
+        contents=contents,
+        lines={path: contents[path].splitlines() for path in syntax_files},
+        inputs=_INPUT_RE.findall(main_content),
+        graphics=graphics,
+        packages=_USEPACKAGE_RE.findall(main_content),
+    )
+
+def check_files(doc):
     """Check all referenced files exist."""
     print("=" * 60)
     print("CHECKING FILE REFERENCES")
@@ -14,59 +108,36 @@ def check_files():
     
     issues = []
     
-    # Check main.tex exists
-    if not os.path.exists("main.tex"):
-        print("❌ ERROR: main.tex not found!")
-        return
-    
-    # Read main.tex
-    with open("main.tex", 'r', encoding='utf-8') as f:
-        content = f.read()
-    
     # Check for \input{} and \include{} commands
-    input_pattern = r'\\(?:input|include)\{([^}]+)\}'
-    inputs = re.findall(input_pattern, content)
-    
-    for inp in inputs:
+    for inp in doc.inputs:
         # Add .tex extension if not present
         if not inp.endswith('.tex'):
             inp = inp + '.tex'
         
-        if not os.path.exists(inp):
+        if not _exists(inp):
             issues.append(f"Missing file: {inp}")
             print(f"  ❌ Missing: {inp}")
         else:
             print(f"  ✓ Found: {inp}")
     
-    # Check for \includegraphics commands
-    graphics_pattern = r'\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}'
-    graphics = re.findall(graphics_pattern, content)
-    
-    # Also check in section files
-    for section_file in Path("sections").glob("*.tex"):
-        with open(section_file, 'r', encoding='utf-8') as f:
-            section_content = f.read()
-            graphics.extend(re.findall(graphics_pattern, section_content))
-    
     print("\n" + "=" * 60)
     print("CHECKING GRAPHICS FILES")
     print("=" * 60)
     
-    for graphic in graphics:
-        # Check common extensions
-        found = False
-        for ext in ['', '.png', '.pdf', '.jpg', '.eps']:
-            if os.path.exists(graphic + ext):
-                print(f"  ✓ Found: {graphic + ext}")
-                found = True
-                break
-        if not found:
+    # Probe all graphics concurrently; report in reference order
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as ex:
+        found_paths = list(ex.map(_probe_graphic, doc.graphics))
+    
+    for graphic, found_path in zip(doc.graphics, found_paths):
+        if found_path:
+            print(f"  ✓ Found: {found_path}")
+        else:
             issues.append(f"Missing graphic: {graphic}")
             print(f"  ❌ Missing: {graphic}")
     
     return issues
 
-def check_syntax():
+def check_syntax(doc):
     """Check for common LaTeX syntax issues."""
     print("\n" + "=" * 60)
     print("CHECKING SYNTAX ISSUES")
@@ -75,38 +146,33 @@ def check_syntax():
     issues = []
     
     # Check all .tex files
-    tex_files = ["main.tex"] + list(Path("sections").glob("*.tex"))
-    
-    for tex_file in tex_files:
-        with open(tex_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.split('\n')
-        
+    for tex_file in doc.syntax_files:
         # Check for unescaped underscores outside math mode
-        for i, line in enumerate(lines, 1):
+        for i, line in enumerate(doc.lines[tex_file], 1):
             # Skip comments
             if '%' in line:
                 line = line[:line.index('%')]
             
-            # Count $ signs to track math mode
-            dollar_count = 0
-            in_math = False
+            if '_' not in line:
+                continue
             
-            for j, char in enumerate(line):
-                if char == '$' and (j == 0 or line[j-1] != '\\'):
-                    dollar_count += 1
-                    in_math = (dollar_count % 2 == 1)
-                elif char == '_' and not in_math and (j == 0 or line[j-1] != '\\'):
+            # An underscore is in math mode when an odd number of
+            # unescaped $ signs precede it on the line
+            dollars = [m.start() for m in _UNESC_DOLLAR.finditer(line)]
+            
+            for m in _UNESC_UNDERSCORE.finditer(line):
+                j = m.start()
+                in_math = bisect.bisect_right(dollars, j) % 2 == 1
+                if not in_math:
                     issues.append(f"{tex_file}:{i} - Unescaped underscore")
                     print(f"  ⚠ {tex_file}:{i} - Unescaped underscore: ...{line[max(0,j-10):min(len(line),j+10)]}...")
     
     # Check for mismatched braces
-    for tex_file in tex_files:
-        with open(tex_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+    for tex_file in doc.syntax_files:
+        content = _ESCAPED_BRACE.sub('', doc.contents[tex_file])
         
-        open_braces = content.count('{') - content.count('\\{')
-        close_braces = content.count('}') - content.count('\\}')
+        open_braces = content.count('{')
+        close_braces = content.count('}')
         
         if open_braces != close_braces:
             issues.append(f"{tex_file} - Mismatched braces ({open_braces} open, {close_braces} close)")
@@ -117,19 +183,14 @@ def check_syntax():
     
     return issues
 
-def check_packages():
+def check_packages(doc):
     """Check for potentially missing packages."""
     print("\n" + "=" * 60)
     print("CHECKING PACKAGE REQUIREMENTS")
     print("=" * 60)
     
-    with open("main.tex", 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    packages = re.findall(r'\\usepackage(?:\[[^\]]*\])?\{([^}]+)\}', content)
-    
     print("Required packages:")
-    for pkg in packages:
+    for pkg in doc.packages:
         print(f"  • {pkg}")
     
     print("\nMake sure you have a complete LaTeX distribution installed:")
@@ -144,20 +205,25 @@ def main():
     
     os.chdir(Path(__file__).parent)
     
+    doc = load_document()
+    if doc is None:
+        print("❌ ERROR: main.tex not found!")
+        return
+    
     all_issues = []
     
     # Check files
-    file_issues = check_files()
+    file_issues = check_files(doc)
     if file_issues:
         all_issues.extend(file_issues)
     
     # Check syntax
-    syntax_issues = check_syntax()
+    syntax_issues = check_syntax(doc)
     if syntax_issues:
         all_issues.extend(syntax_issues)
     
     # Check packages
-    check_packages()
+    check_packages(doc)
     
     # Summary
     print("\n" + "=" * 60)
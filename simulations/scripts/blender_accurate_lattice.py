@@ -1,13 +1,17 @@
 """
 Accurate Blender visualization of the multi-functional flow lattice
 Based on the actual specifications from the paper
-Run: blender --python blender_accurate_lattice.py
+Run: blender --python blender_accurate_lattice.py [-- --final]
 """
 
 import bpy
+import os
+import sys
 import math
-import bmesh
-from mathutils import Vector
+
+# Blender does not put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from blender_utils import bulk_edit, create_cylinder_batch
 
 def clear_scene():
     """Clear all objects from the scene."""
@@ -28,6 +32,28 @@ def create_material(name, color, metallic=0.8, roughness=0.4):
     bsdf.inputs[7].default_value = roughness
     return mat
 
+def join_objects(objects, name):
+    """Join mesh objects into a single object."""
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in objects:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = objects[0]
+    bpy.ops.object.join()
+    joined = bpy.context.active_object
+    joined.name = name
+    return joined
+
+def subtract_cutter(target, cutter, name, solver, use_self=False):
+    """Apply a boolean difference to the active target and delete the cutter."""
+    modifier = target.modifiers.new(name=name, type='BOOLEAN')
+    modifier.operation = 'DIFFERENCE'
+    modifier.solver = solver
+    if solver == 'EXACT':
+        modifier.use_self = use_self
+    modifier.object = cutter
+    bpy.ops.object.modifier_apply(modifier=name)
+    bpy.data.objects.remove(cutter, do_unlink=True)
+
 def create_single_tile():
     """
     Create a single tile based on paper specifications:
@@ -65,20 +91,20 @@ def create_single_tile():
     num_cylinders_x = 8
     num_cylinders_y = 5
     
-    cylinders = []
+    centers = []
     for i in range(num_cylinders_x):
         for j in range(num_cylinders_y):
             x = (i - num_cylinders_x/2 + 0.5) * (tile_width / num_cylinders_x)
             y = (j - num_cylinders_y/2 + 0.5) * (tile_height / num_cylinders_y)
-            
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=combustion_diameter/2,
-                depth=tile_depth * 1.1,  # Slightly longer to ensure clean boolean
-                location=(x, y, 0)
-            )
-            cyl = bpy.context.active_object
-            cyl.name = f"Combustion_{i}_{j}"
-            cylinders.append(cyl)
+            centers.append((x, y, 0))
+    
+    cylinders = create_cylinder_batch(
+        "Combustion_Cylinders",
+        centers,
+        radius=combustion_diameter/2,
+        depth=tile_depth * 1.1,  # Slightly longer to ensure clean boolean
+        segments=12  # Enough facets at render scale, 3x less CSG input
+    )
     
     # Create triangular flow channels (2mm)
     channel_width = 2 * scale
@@ -104,24 +130,15 @@ def create_single_tile():
         channel.location = (x, 0, 0)
         channels.append(channel)
     
-    # Boolean operations to create internal structure
-    bpy.context.view_layer.objects.active = tile
+    # Boolean operations to create internal structure, one per cutter
+    # category. The combustion cylinders never touch, so the FAST solver
+    # handles them; the channel grid crosses itself and needs the exact
+    # solver in self-intersection mode.
+    channel_union = join_objects(channels, "Channel_Union")
     
-    # Subtract combustion chambers
-    for cyl in cylinders:
-        modifier = tile.modifiers.new(name="Boolean_Combustion", type='BOOLEAN')
-        modifier.operation = 'DIFFERENCE'
-        modifier.object = cyl
-        bpy.ops.object.modifier_apply(modifier="Boolean_Combustion")
-        bpy.data.objects.remove(cyl, do_unlink=True)
-    
-    # Subtract flow channels
-    for channel in channels:
-        modifier = tile.modifiers.new(name="Boolean_Channel", type='BOOLEAN')
-        modifier.operation = 'DIFFERENCE'
-        modifier.object = channel
-        bpy.ops.object.modifier_apply(modifier="Boolean_Channel")
-        bpy.data.objects.remove(channel, do_unlink=True)
+    bpy.context.view_layer.objects.active = tile
+    subtract_cutter(tile, cylinders, "Boolean_Combustion", solver='FAST')
+    subtract_cutter(tile, channel_union, "Boolean_Channel", solver='EXACT', use_self=True)
     
     return tile
 
@@ -139,6 +156,7 @@ def create_cutaway_section(tile):
     bpy.context.view_layer.objects.active = tile
     modifier = tile.modifiers.new(name="Cutaway", type='BOOLEAN')
     modifier.operation = 'DIFFERENCE'
+    modifier.solver = 'FAST'  # Single convex cutter, no overlaps to resolve
     modifier.object = cutter
     bpy.ops.object.modifier_apply(modifier="Cutaway")
     
@@ -197,7 +215,8 @@ def setup_camera_and_lighting():
     
     # Setup world background
     world = bpy.context.scene.world
-    world.use_nodes = True
+    if not world.use_nodes:
+        world.use_nodes = True
     bg = world.node_tree.nodes['Background']
     bg.inputs[0].default_value = (0.95, 0.95, 0.95, 1.0)  # Light gray
     bg.inputs[1].default_value = 0.5  # Low strength
@@ -236,12 +255,41 @@ def add_flow_indicators():
         shaft.name = f"Flow_Arrow_{i}"
         shaft.data.materials.append(arrow_mat)
 
-def render_technical_view(output_path="../../paper/figures/schematics/lattice_tile_technical.png"):
-    """Render with technical illustration settings."""
+def enable_gpu_compute(scene):
+    """Point Cycles at the GPU (OptiX, then CUDA); stay on CPU if neither is available."""
+    prefs = bpy.context.preferences.addons['cycles'].preferences
+    for device_type in ('OPTIX', 'CUDA'):
+        try:
+            prefs.compute_device_type = device_type
+        except TypeError:
+            continue  # Backend not compiled into this Blender build
+        prefs.get_devices()
+        gpus = [d for d in prefs.devices if d.type == device_type]
+        if gpus:
+            for d in gpus:
+                d.use = True
+            scene.cycles.device = 'GPU'
+            print(f"Cycles rendering on {device_type}: {', '.join(d.name for d in gpus)}")
+            return True
+    print("No GPU compute device found, Cycles rendering on CPU")
+    return False
+
+def render_technical_view(output_path="../../paper/figures/schematics/lattice_tile_technical.png", quality="draft"):
+    """
+    Render with technical illustration settings.
+    quality="draft" uses Eevee for fast iteration; "final" uses Cycles.
+    """
     
     scene = bpy.context.scene
-    scene.render.engine = 'CYCLES'
-    scene.cycles.samples = 128  # Lower samples for technical illustration
+    if quality == "final":
+        scene.render.engine = 'CYCLES'
+        scene.cycles.samples = 128  # Lower samples for technical illustration
+        scene.cycles.use_adaptive_sampling = True
+        scene.cycles.adaptive_threshold = 0.01  # Stop converged pixels early
+        enable_gpu_compute(scene)
+    else:
+        scene.render.engine = 'BLENDER_EEVEE'
+        scene.eevee.taa_render_samples = 16
     scene.render.image_settings.file_format = 'PNG'
     scene.render.resolution_x = 2400
     scene.render.resolution_y = 1600
@@ -250,7 +298,6 @@ def render_technical_view(output_path="../../paper/figures/schematics/lattice_ti
     # Enable transparent background for LaTeX integration
     scene.render.film_transparent = True
     
-    import os
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     scene.render.filepath = output_path
     
@@ -262,23 +309,28 @@ def main():
     
     print("Creating accurate lattice tile visualization...")
     
+    # Blender passes script arguments after "--"
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    quality = "final" if "--final" in argv else "draft"
+    
     # Clear scene
     clear_scene()
     
-    # Create the tile structure
-    tile = create_single_tile()
-    
-    # Create cutaway view
-    create_cutaway_section(tile)
-    
-    # Add flow indicators
-    add_flow_indicators()
+    with bulk_edit():
+        # Create the tile structure
+        tile = create_single_tile()
+        
+        # Create cutaway view
+        create_cutaway_section(tile)
+        
+        # Add flow indicators
+        add_flow_indicators()
     
     # Setup rendering
     setup_camera_and_lighting()
     
     # Render
-    render_technical_view()
+    render_technical_view(quality=quality)
     
     # Also save the .blend file for manual adjustments
     bpy.ops.wm.save_as_mainfile(filepath="../../paper/figures/schematics/lattice_tile.blend")
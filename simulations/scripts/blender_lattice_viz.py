@@ -5,9 +5,13 @@ Run this script in Blender's Python console or as: blender --python blender_latt
 
 import bpy
 import math
-import random
-from mathutils import Vector
+import numpy as np
 import os
+import sys
+
+# Blender does not put the script's directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from blender_utils import bulk_edit, create_cylinder_batch
 
 def clear_scene():
     """Remove all objects from the scene."""
@@ -38,26 +42,20 @@ def create_hexagonal_lattice(rows=5, cols=5, channel_diameter=0.002, wall_thickn
     hex_radius = channel_diameter / 2 + wall_thickness
     hex_spacing = hex_radius * math.sqrt(3)
     
-    channels = []
-    
-    for row in range(rows):
-        for col in range(cols):
-            # Calculate position with hexagonal offset
-            x = col * hex_spacing * 1.5
-            y = row * hex_spacing
-            if col % 2 == 1:
-                y += hex_spacing / 2
-            
-            # Create cylinder for channel
-            bpy.ops.mesh.primitive_cylinder_add(
-                vertices=6,  # Hexagonal
-                radius=channel_diameter/2,
-                depth=height,
-                location=(x, y, height/2)
-            )
-            channel = bpy.context.active_object
-            channel.name = f"Channel_{row}_{col}"
-            channels.append(channel)
+    # Channel centers with hexagonal offset on odd columns
+    col_idx, row_idx = np.meshgrid(np.arange(cols), np.arange(rows))
+    x = col_idx * hex_spacing * 1.5
+    y = row_idx * hex_spacing + (col_idx % 2) * (hex_spacing / 2)
+    centers = np.stack([x.ravel(), y.ravel(), np.full(x.size, height/2)], axis=1)
+    
+    # All channels as one hexagonal-prism mesh
+    channels = create_cylinder_batch(
+        "Channels",
+        centers,
+        radius=channel_diameter/2,
+        depth=height,
+        segments=6  # Hexagonal
+    )
     
     # Create outer structure
     bpy.ops.mesh.primitive_cube_add(
@@ -68,16 +66,15 @@ def create_hexagonal_lattice(rows=5, cols=5, channel_diameter=0.002, wall_thickn
     outer.name = "Outer_Structure"
     outer.scale = (cols * hex_spacing * 0.8, rows * hex_spacing * 0.6, height)
     
-    # Boolean operations to create channels
-    for channel in channels:
-        modifier = outer.modifiers.new(name="Boolean", type='BOOLEAN')
-        modifier.operation = 'DIFFERENCE'
-        modifier.object = channel
-        # Apply modifier
-        bpy.context.view_layer.objects.active = outer
-        bpy.ops.object.modifier_apply(modifier="Boolean")
-        # Delete channel object
-        bpy.data.objects.remove(channel, do_unlink=True)
+    # Boolean operation to create channels
+    modifier = outer.modifiers.new(name="Boolean", type='BOOLEAN')
+    modifier.operation = 'DIFFERENCE'
+    modifier.object = channels
+    # Apply modifier
+    bpy.context.view_layer.objects.active = outer
+    bpy.ops.object.modifier_apply(modifier="Boolean")
+    # Delete channel object
+    bpy.data.objects.remove(channels, do_unlink=True)
     
     # Apply material
     outer.data.materials.append(lattice_mat)
@@ -176,7 +173,8 @@ def setup_camera_and_lighting():
     
     # Add HDRI environment (if available)
     world = bpy.context.scene.world
-    world.use_nodes = True
+    if not world.use_nodes:
+        world.use_nodes = True
     bg = world.node_tree.nodes['Background']
     bg.inputs[0].default_value = (0.05, 0.05, 0.05, 1.0)  # Dark gray background
 
@@ -229,17 +227,18 @@ def main():
     # Clear the scene
     clear_scene()
     
-    # Create hexagonal lattice
-    lattice = create_hexagonal_lattice(rows=7, cols=7)
-    
-    # Add micro-combustion chambers
-    chambers = create_micro_combustion_chambers(lattice)
-    
-    # Add flow arrows
-    arrows = create_flow_arrows(lattice)
-    
-    # Create cutaway view for better visualization
-    create_cutaway_view(lattice)
+    with bulk_edit():
+        # Create hexagonal lattice
+        lattice = create_hexagonal_lattice(rows=7, cols=7)
+        
+        # Add micro-combustion chambers
+        chambers = create_micro_combustion_chambers(lattice)
+        
+        # Add flow arrows
+        arrows = create_flow_arrows(lattice)
+        
+        # Create cutaway view for better visualization
+        create_cutaway_view(lattice)
     
     # Setup camera and lighting
     setup_camera_and_lighting()
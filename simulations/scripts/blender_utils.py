@@ -0,0 +1,44 @@
+"""
+Shared Blender helpers for the lattice visualization scripts
+"""
+
+import bpy
+import bmesh
+from contextlib import contextmanager
+from mathutils import Matrix
+
+@contextmanager
+def bulk_edit():
+    """Suppress undo pushes and UI redraws while building geometry in bulk."""
+    prefs = bpy.context.preferences.edit
+    scene = bpy.context.scene
+    undo_steps = prefs.undo_steps
+    lock_interface = scene.render.use_lock_interface
+    prefs.undo_steps = 0
+    scene.render.use_lock_interface = True
+    try:
+        yield
+    finally:
+        prefs.undo_steps = undo_steps
+        scene.render.use_lock_interface = lock_interface
+        bpy.context.view_layer.update()
+
+def create_cylinder_batch(name, centers, radius, depth, segments):
+    """Build many cylinders as one mesh object with bmesh, bypassing bpy.ops."""
+    bm = bmesh.new()
+    for center in centers:
+        bmesh.ops.create_cone(
+            bm,
+            cap_ends=True,
+            segments=segments,
+            radius1=radius,
+            radius2=radius,
+            depth=depth,
+            matrix=Matrix.Translation(center)
+        )
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.collection.objects.link(obj)
+    return obj
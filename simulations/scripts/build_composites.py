@@ -1,6 +1,7 @@
 """Build composite multi-panel figures for manuscript from generated individual plots."""
 from __future__ import annotations
-import os, argparse, matplotlib.pyplot as plt
+import os, argparse, numpy as np, matplotlib.pyplot as plt
+from PIL import Image
 from publication_style import set_pub_style, save_fig
 
 FIG_SRC = 'paper/figures/simulations'
@@ -27,22 +28,28 @@ PANELS = [
     }
 ]
 
+def load_panel_image(path):
+    """Decode a PNG as uint8 pixels (a quarter of the memory of plt.imread's float32)."""
+    with Image.open(path) as im:
+        return np.asarray(im)
+
 def build(panel):
-    set_pub_style()
     rows, cols = panel['layout']
     fig, axes = plt.subplots(rows, cols, figsize=(6*cols/2,4*rows/1.2))
     axes_list = axes.flatten() if hasattr(axes,'flatten') else [axes]
     for ax, fname, title in zip(axes_list, panel['files'], panel['titles']):
         path = os.path.join(FIG_SRC, fname)
         if os.path.isfile(path):
-            img = plt.imread(path)
-            ax.imshow(img)
+            img = load_panel_image(path)
+            # 'none' embeds pixels as-is instead of resampling them for the output raster
+            ax.imshow(img, interpolation='none')
             ax.set_title(title)
         else:
             ax.text(0.5,0.5,'Missing '+fname, ha='center', va='center')
         ax.axis('off')
     out_base = os.path.join(OUT_DIR, panel['id'].lower())
     save_fig(fig, out_base)
+    plt.close(fig)
     print('Wrote composite', out_base+'.png')
 
 def main():
@@ -50,6 +57,7 @@ def main():
     ap.add_argument('--only', nargs='*', help='Subset panel IDs')
     args = ap.parse_args()
     selected = [p for p in PANELS if (not args.only or p['id'] in args.only)]
+    set_pub_style()
     for p in selected:
         build(p)
 
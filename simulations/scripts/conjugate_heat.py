@@ -1,111 +1,418 @@
 """SIM-HT-CONJ: Conjugate heat transfer & coupling efficiency simulation."""
 from __future__ import annotations
-import torch, numpy as np, argparse, os, math, matplotlib.pyplot as plt, copy, statistics
+import torch, numpy as np, argparse, os, math, functools, matplotlib.pyplot as plt, statistics
 from publication_style import set_pub_style, save_fig
 from sim_utils import build_metadata, save_results, register_figure
+try:
+    import numba
+except ImportError:  # optional: CPU runs fall back to the PyTorch step
+    numba = None
 
 def stability_dt(dx, alpha):
     return 0.24 * dx * dx / alpha
 
-def apply_convective_boundary(T, h, dx, rho, cp, dt, T_inf):
-    """Approximate convective cooling by relaxing boundary cells toward ambient.
+def edge_sum(T):
+    """Sum of the boundary ring of each field (corners counted once) as four slice reductions."""
+    return T[..., 0, :].sum(-1) + T[..., -1, :].sum(-1) + T[..., 1:-1, 0].sum(-1) + T[..., 1:-1, -1].sum(-1)
 
-    NOTE: This mutates T in place. The factor derives from lumped node energy balance:
-        (rho*cp*dx^2) dT/dt = - h * dx * (T - T_inf)  =>  dT = - h/(rho*cp*dx) * (T-T_inf) dt
+def boundary_decay(shape, coeff, device):
+    """Per-cell factor applied to (T - T_inf) by the convective boundary.
+
+    Lumped node balance (rho*cp*dx^2) dT/dt = -h*dx*(T - T_inf) relaxes each boundary cell by
+    coeff = h*dt/(rho*cp*dx) per step. Edge cells relax once, corners twice (they lie on two
+    edges); interior cells are untouched.
+    `coeff` may be a (B,1,1) tensor to give each batch member its own relaxation rate.
     """
-    coeff = h * dt / (rho * cp * dx)
-    for sl in ( (0, slice(None)), (-1, slice(None)), (slice(None), 0), (slice(None), -1) ):
-        T[sl] -= coeff * (T[sl] - T_inf)
+    edge_count = torch.zeros(shape[-2:], device=device)
+    edge_count[0, :] += 1; edge_count[-1, :] += 1; edge_count[:, 0] += 1; edge_count[:, -1] += 1
+    return (1.0 - coeff) ** edge_count
 
-def run_sim(diam_mm: float, args, device):
-    Lx = args.domain_mm * 1e-3
-    nx = ny = args.grid
-    dx = Lx / nx
-    alpha, rho, cp, h = args.alpha, args.rho, args.cp, args.h
-    T_inf, power_W, steps = args.ambient_K, args.power_W, args.steps
-    diam = diam_mm * 1e-3
-    dt = min(stability_dt(dx, alpha), args.dt)
-    if args.verbose:
-        print(f"[D={diam_mm}mm] dt={dt:.3e}s")
-    T = torch.full((nx, ny), T_inf, device=device)
+def laplacian(T, pad=0.0):
+    """5-point Laplacian (cell units) as shifted adds; cells outside the domain read as `pad`.
+
+    With pad=0 this equals conv2d with the [[0,1,0],[1,-4,1],[0,1,0]] kernel and padding=1.
+    """
+    P = torch.nn.functional.pad(T, (1, 1, 1, 1), value=pad)
+    return P[..., :-2, 1:-1] + P[..., 2:, 1:-1] + P[..., 1:-1, :-2] + P[..., 1:-1, 2:] - 4.0 * T
+
+def fused_step(theta, decay, k_diff, T_inf, k_energy, convective=True):
+    """One explicit time step after source deposition: 5-point diffusion, convective boundary.
+
+    Works on the excess temperature theta = T - T_inf, a (B, nx, ny) batch of independent fields;
+    per-member coefficients broadcast as (B,1,1). Neighbours outside the domain read as T = 0 K
+    (theta = -T_inf), matching conv2d(padding=1) on T. Coefficients are FP32, so a low-precision
+    field is only rounded when stored. Written as pure elementwise/slice arithmetic so
+    torch.compile can fuse it into a couple of kernels.
+    Returns the updated field and the energy (J) convected out of each member during the step;
+    with convective=False (h == 0) the boundary and its accounting are skipped.
+    """
+    T = theta + k_diff * laplacian(theta, -T_inf)
+    if not convective:
+        return T.to(theta.dtype), torch.zeros(T.shape[0], device=T.device)
+    # Closed form: each edge cell gives up (1 - decay) of its excess temperature
+    lost = edge_sum(T * (1.0 - decay)) * k_energy
+    return (T * decay).to(theta.dtype), lost
+
+DTYPES = {'fp32': torch.float32, 'bf16': torch.bfloat16}
+
+_compiled_steps = {}
+
+def get_step_fn(device, compile_step=True, cuda_graph=False):
+    """Return fused_step, compiled once per mode.
+
+    On CUDA the compiled step uses CUDA graphs itself unless the caller captures the whole
+    step into its own graph (cuda_graph=True), which cannot nest inductor's graphs.
+    """
+    if not compile_step:
+        return fused_step
+    mode = 'reduce-overhead' if device.type == 'cuda' and not cuda_graph else 'default'
+    if mode not in _compiled_steps:
+        _compiled_steps[mode] = torch.compile(fused_step, mode=mode, fullgraph=True)
+    return _compiled_steps[mode]
+
+def capture_cuda_graph(body, warmup=10):
+    """Warm `body` up on a side stream, then capture one call of it into a CUDA graph.
+
+    `body` must update static tensors in place; the warmup calls run for real, so the caller
+    resets that state before the first replay.
+    """
+    stream = torch.cuda.Stream()
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream):
+        for _ in range(warmup):
+            body()
+    torch.cuda.current_stream().wait_stream(stream)
+    graph = torch.cuda.CUDAGraph()
+    with torch.cuda.graph(graph):
+        body()
+    return graph
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _step_cpu_njit(theta, theta_new, src, decay, k_diff, pad, tile, tile_loss):
+        """fused_step plus source deposition in one pass, writing into theta_new.
+
+        The field is swept in tile x tile blocks so the stencil's working set stays in L1;
+        blocks of all batch members run in parallel and each stores the energy its edge cells
+        lose to convection in tile_loss (units of theta, scaled by the caller).
+        """
+        B, nx, ny = theta.shape
+        ti = (nx + tile - 1) // tile
+        tj = (ny + tile - 1) // tile
+        for t_id in numba.prange(B * ti * tj):
+            b = t_id // (ti * tj)
+            i0 = (t_id // tj) % ti * tile
+            j0 = t_id % tj * tile
+            kd = k_diff[b]
+            loss = 0.0
+            for i in range(i0, min(i0 + tile, nx)):
+                for j in range(j0, min(j0 + tile, ny)):
+                    t = theta[b, i, j] + src[b, i, j]
+                    up = theta[b, i-1, j] + src[b, i-1, j] if i > 0 else pad
+                    down = theta[b, i+1, j] + src[b, i+1, j] if i < nx-1 else pad
+                    left = theta[b, i, j-1] + src[b, i, j-1] if j > 0 else pad
+                    right = theta[b, i, j+1] + src[b, i, j+1] if j < ny-1 else pad
+                    v = t + kd * (up + down + left + right - 4.0 * t)
+                    if i == 0 or i == nx-1 or j == 0 or j == ny-1:
+                        loss += v * (1.0 - decay[b, i, j])
+                        v = v * decay[b, i, j]
+                    theta_new[b, i, j] = v
+            tile_loss[t_id] = loss
+
+def make_njit_step(theta, src, decay, k_diff, T_inf, k_energy, tile=64):
+    """Double-buffered Numba step with the same (theta, delta) interface as fused_step.
+
+    The returned tensors are zero-copy views of NumPy buffers that alternate between calls.
+    """
+    B, nx, ny = theta.shape
+    buffers = [theta.numpy(), np.empty_like(theta.numpy())]
+    src, decay = src.numpy(), decay.numpy()
+    k_diff = k_diff.flatten().numpy()
+    pad = np.float32(-T_inf)
+    tile_loss = np.empty(B * -(-nx // tile) * -(-ny // tile))
+    k_energy = float(k_energy)
+    def step(_theta):
+        _step_cpu_njit(buffers[0], buffers[1], src, decay, k_diff, pad, tile, tile_loss)
+        buffers.reverse()
+        delta = tile_loss.reshape(B, -1).sum(axis=1) * k_energy
+        return torch.from_numpy(buffers[0]), torch.from_numpy(delta)
+    return step
+
+# Hand-written CUDA version of the Numba kernel: 16x16 thread blocks stage an 18x18 tile
+# (with halo) of theta + source in shared memory, one launch per step, batch members on grid z.
+_CUDA_STENCIL_SRC = r"""
+#include <torch/extension.h>
+#include <ATen/cuda/CUDAContext.h>
+
+__global__ void stencil_step_kernel(const float* __restrict__ theta, float* __restrict__ theta_new,
+                                    const float* __restrict__ src, const float* __restrict__ decay,
+                                    const float* __restrict__ k_diff, float pad, int nx, int ny,
+                                    float* __restrict__ loss) {
+    __shared__ float tile[18][18];
+    const int b = blockIdx.z;
+    const size_t off = (size_t)b * nx * ny;
+    const int i = blockIdx.y * 16 + threadIdx.y;
+    const int j = blockIdx.x * 16 + threadIdx.x;
+    for (int r = threadIdx.y; r < 18; r += 16) {
+        for (int c = threadIdx.x; c < 18; c += 16) {
+            const int gi = blockIdx.y * 16 + r - 1, gj = blockIdx.x * 16 + c - 1;
+            tile[r][c] = (gi >= 0 && gi < nx && gj >= 0 && gj < ny)
+                ? theta[off + (size_t)gi * ny + gj] + src[off + (size_t)gi * ny + gj] : pad;
+        }
+    }
+    __syncthreads();
+    if (i >= nx || j >= ny) return;
+    const int ty = threadIdx.y + 1, tx = threadIdx.x + 1;
+    const float t = tile[ty][tx];
+    float v = t + k_diff[b] * (tile[ty - 1][tx] + tile[ty + 1][tx] + tile[ty][tx - 1] + tile[ty][tx + 1] - 4.0f * t);
+    if (i == 0 || i == nx - 1 || j == 0 || j == ny - 1) {
+        const float d = decay[off + (size_t)i * ny + j];
+        atomicAdd(&loss[b], v * (1.0f - d));
+        v *= d;
+    }
+    theta_new[off + (size_t)i * ny + j] = v;
+}
+
+void stencil_step(torch::Tensor theta, torch::Tensor theta_new, torch::Tensor src, torch::Tensor decay,
+                  torch::Tensor k_diff, double pad, torch::Tensor loss) {
+    const int B = theta.size(0), nx = theta.size(1), ny = theta.size(2);
+    loss.zero_();
+    const dim3 block(16, 16);
+    const dim3 grid((ny + 15) / 16, (nx + 15) / 16, B);
+    stencil_step_kernel<<<grid, block, 0, at::cuda::getCurrentCUDAStream()>>>(
+        theta.data_ptr<float>(), theta_new.data_ptr<float>(), src.data_ptr<float>(), decay.data_ptr<float>(),
+        k_diff.data_ptr<float>(), (float)pad, nx, ny, loss.data_ptr<float>());
+}
+"""
+
+_cuda_stencil = None
+
+def load_cuda_stencil():
+    """Build (first call only) and return the inline CUDA stencil extension."""
+    global _cuda_stencil
+    if _cuda_stencil is None:
+        from torch.utils.cpp_extension import load_inline
+        _cuda_stencil = load_inline(
+            name='conjugate_heat_stencil',
+            cpp_sources='void stencil_step(torch::Tensor theta, torch::Tensor theta_new, torch::Tensor src, '
+                        'torch::Tensor decay, torch::Tensor k_diff, double pad, torch::Tensor loss);',
+            cuda_sources=_CUDA_STENCIL_SRC,
+            functions=['stencil_step'],
+        )
+    return _cuda_stencil
+
+def make_cuda_kernel_step(theta, src, decay, k_diff, T_inf, k_energy):
+    """Double-buffered CUDA-extension step with the same (theta, delta) interface as fused_step."""
+    ext = load_cuda_stencil()
+    buffers = [theta, torch.empty_like(theta)]
+    src, decay = src.contiguous(), decay.contiguous()
+    k_diff = k_diff.flatten().contiguous()
+    loss = torch.zeros(theta.shape[0], device=theta.device)
+    def step(_theta):
+        ext.stencil_step(buffers[0], buffers[1], src, decay, k_diff, -T_inf, loss)
+        buffers.reverse()
+        return buffers[0], loss * k_energy
+    return step
+
+@functools.lru_cache(maxsize=None)
+def chamber_geometry(nx, ny, Lx, diams_mm, annulus_factor, device):
+    """Chamber and local-annulus masks, one (nx, ny) plane per diameter in the tuple `diams_mm`.
+
+    Cached, so replicates of a diameter and repeated runs on the same grid share one set of
+    geometry tensors instead of rebuilding coordinates and masks each time.
+    """
     x = torch.linspace(0, Lx, nx, device=device)
     y = torch.linspace(0, Lx, ny, device=device)
     X, Y = torch.meshgrid(x, y, indexing='ij')
     cx = cy = Lx/2
-    r = diam/2
-    chamber_mask = (X - cx)**2 + (Y - cy)**2 <= r*r
-    area = math.pi * r * r
+    dist2 = (X - cx)**2 + (Y - cy)**2
+    radii = [d * 1e-3 / 2 for d in diams_mm]
+    planes = len(diams_mm)
+    chamber_mask = dist2 <= torch.tensor([r*r for r in radii], device=device).view(planes, 1, 1)
+    local_mask = dist2 <= torch.tensor([(r * annulus_factor)**2 for r in radii], device=device).view(planes, 1, 1)
+    return chamber_mask, local_mask
+
+SERIES_KEYS = ('time_s', 'input_eff', 'retained_vs_loss', 'input_eff_local', 'retained_vs_loss_local',
+               'maxT', 'stored_J', 'conv_loss_J')
+
+def efficiency(num, den):
+    """Elementwise num/den clipped to [0, 1]; 0 where den is not positive."""
+    return np.clip(np.divide(num, den, out=np.zeros_like(num), where=den > 0), 0.0, 1.0)
+
+def run_batch(diams_mm, args, device, *, alphas=None, hs=None, grid=None, snapshot_steps=None, snapshot_dir=None):
+    """Simulate B independent chambers as one (B, nx, ny) field; returns one result dict per member.
+
+    Member b uses diameter diams_mm[b] and, if given, its own alphas[b] / hs[b] (default args.alpha / args.h).
+    `grid` overrides args.grid, e.g. for refinement runs.
+    Field images of member 0 are written to snapshot_dir after each step in snapshot_steps
+    (-1 = final step) and listed under its 'field_figs' key.
+    Each member freezes its accounting and stops recording once it exceeds the temperature cap.
+    """
+    B = len(diams_mm)
+    Lx = args.domain_mm * 1e-3
+    nx = ny = grid or args.grid
+    dx = Lx / nx
+    rho, cp = args.rho, args.cp
+    alphas = [args.alpha] * B if alphas is None else [float(a) for a in alphas]
+    hs = [args.h] * B if hs is None else [float(h) for h in hs]
+    T_inf, power_W, steps = args.ambient_K, args.power_W, args.steps
+    dts = [min(stability_dt(dx, alpha), args.dt) for alpha in alphas]
+    if args.verbose:
+        for d, dt in zip(diams_mm, dts):
+            print(f"[D={d}mm] dt={dt:.3e}s")
+    dtype = DTYPES[getattr(args, 'dtype', 'fp32')]
+    # Excess temperature T - T_inf; starting at zero keeps low-precision storage meaningful
+    theta = torch.zeros((B, nx, ny), device=device, dtype=dtype)
+    radii = [d * 1e-3 / 2 for d in diams_mm]
+    def per_member(values):
+        return torch.tensor(values, device=device).view(B, 1, 1)
+    # Geometry is built once per distinct diameter and shared by its replicates
+    annulus_factor = getattr(args, 'local_annulus_factor', 1.5)
+    distinct = sorted(set(diams_mm))
+    member_plane = torch.tensor([distinct.index(d) for d in diams_mm], device=device)
+    chamber_planes, local_planes = chamber_geometry(nx, ny, Lx, tuple(distinct), annulus_factor, device)
+    chamber_mask, local_mask = chamber_planes[member_plane], local_planes[member_plane]
     # Volumetric heat source (W/m^3)
     thickness = globals().get('_SIM_THICKNESS_M', 5e-3)
-    q_vol = power_W / (area * thickness)
+    q_vol = [power_W / (math.pi * r * r * thickness) for r in radii]
     # Temperature rise rate (K/s)
-    source_coeff = q_vol / (rho * cp)
-    kernel = torch.tensor([[0.,1.,0.],[1.,-4.,1.],[0.,1.,0.]], device=device).view(1,1,3,3)
-    thickness = globals().get('_SIM_THICKNESS_M', 5e-3)
+    source_coeff = [q / (rho * cp) for q in q_vol]
     vol_elem = dx * dx * thickness
-    total_input = 0.0
-    conv_loss = 0.0
+    # Static masks as flat indices into the (B*nx*ny) field: the source touches only chamber
+    # cells and the local energy sum reads only annulus cells, O(area) instead of O(nx*ny)
+    chamber_idx = chamber_mask.flatten().nonzero().squeeze(1)
+    local_idx = local_mask.flatten().nonzero().squeeze(1)
+    local_member = local_idx // (nx * ny)
     # Baseline stored energy (should be ~0 because initialized at ambient, kept for clarity)
     baseline_energy = 0.0
-    times=[]; eff_series=[]; maxTs=[]; stored_series=[]; loss_series=[]; local_eff_series=[]
-    boundary_mask = torch.zeros_like(T, dtype=torch.bool)
-    boundary_mask[0,:]=True; boundary_mask[-1,:]=True; boundary_mask[:,0]=True; boundary_mask[:,-1]=True
-    for step in range(steps):
-        # Source deposition
-        T[chamber_mask] += source_coeff * dt
-        total_input += power_W * dt
-        # Diffusion
-        lap = torch.nn.functional.conv2d(T.unsqueeze(0).unsqueeze(0), kernel, padding=1).squeeze()
-        T = T + alpha * dt / (dx * dx) * lap
+    # Sampled series as preallocated (B, n_samples) arrays; member b has n_saved[b] valid columns
+    n_samples = (steps - 1) // args.save_interval + 1 + ((steps - 1) % args.save_interval != 0)
+    series = {k: np.empty((B, n_samples)) for k in SERIES_KEYS}
+    n_saved = np.zeros(B, dtype=int)
+    # Loop constants, computed once: per-member coefficients as (B,1,1) tensors
+    k_src = per_member([s * dt for s, dt in zip(source_coeff, dts)])
+    k_diff = per_member([alpha * dt / (dx * dx) for alpha, dt in zip(alphas, dts)])
+    k_bnd = per_member([h * dt / (rho * cp * dx) for h, dt in zip(hs, dts)])
+    k_energy = torch.tensor(rho * cp * vol_elem, device=device)  # J per kelvin per cell
+    e_step = [power_W * dt for dt in dts]  # J deposited per step
+    decay = boundary_decay(theta.shape, k_bnd, device)
+    convective = any(h > 0 for h in hs)
+    src_vals = k_src.expand(B, nx, ny).flatten()[chamber_idx].to(dtype)
+    # CPU FP32 runs use the Numba kernel when available; CUDA and bf16 use the PyTorch step
+    use_njit = numba is not None and device.type == 'cpu' and dtype == torch.float32 and not getattr(args, 'no_numba', False)
+    # On CUDA the whole step, accounting included, is replayed from one captured graph
+    use_cuda_kernel = device.type == 'cuda' and dtype == torch.float32 and getattr(args, 'cuda_kernel', False)
+    # The hand-written kernel swaps buffers between steps, which a captured graph cannot follow
+    use_graph = device.type == 'cuda' and not use_cuda_kernel and not getattr(args, 'no_cuda_graph', False)
+    if use_njit or use_cuda_kernel:
+        src = torch.zeros(B * nx * ny, device=device).index_add_(0, chamber_idx, src_vals).view(B, nx, ny)
+    if use_njit:
+        step_fn = make_njit_step(theta, src, decay, k_diff, T_inf, k_energy, getattr(args, 'tile', 64))
+    elif use_cuda_kernel:
+        step_fn = make_cuda_kernel_step(theta, src, decay, k_diff, T_inf, k_energy)
+    else:
+        step_fn = get_step_fn(device, not args.no_compile, cuda_graph=use_graph)
+    # Accumulators stay on the device; host syncs happen only at save_interval steps.
+    # `alive` drops to 0 for a member once it has exceeded the temperature cap, freezing its
+    # accounting from the following step; it records no further samples after the next sync.
+    conv_loss_t = torch.zeros(B, device=device)
+    steps_run = torch.zeros(B, device=device)
+    alive = torch.ones(B, device=device)
+    cap_theta = args.max_temperature_cap - T_inf
+    def advance():
+        nonlocal theta
+        # Safety: stop if runaway temperature reached (checked on-device, no sync)
+        alive.mul_(theta.amax((-2, -1)) <= cap_theta)
+        if use_njit or use_cuda_kernel:
+            theta, delta = step_fn(theta)
+        else:
+            theta.view(-1).index_add_(0, chamber_idx, src_vals)
+            new_theta, delta = step_fn(theta, decay, k_diff, T_inf, k_energy, convective)
+            if use_graph:
+                theta.copy_(new_theta)  # graph replays read and write one static buffer
+            else:
+                theta = new_theta
         # Convection loss accounting
-        if h > 0:
-            E_before = ((T[boundary_mask]-T_inf) * rho * cp * vol_elem).sum().item()
-            apply_convective_boundary(T, h, dx, rho, cp, dt, T_inf)
-            E_after = ((T[boundary_mask]-T_inf) * rho * cp * vol_elem).sum().item()
-            delta = E_before - E_after
-            if delta > 0:
-                conv_loss += delta
+        conv_loss_t.add_(delta.clamp(min=0) * alive)
+        steps_run.add_(alive)
+    graph = None
+    if use_graph:
+        theta0 = theta.clone()
+        graph = capture_cuda_graph(advance)
+        theta.copy_(theta0); conv_loss_t.zero_(); steps_run.zero_(); alive.fill_(1.0)
+    stopped = [False] * B
+    field_figs = []
+    for step in range(steps):
+        if graph is not None:
+            graph.replay()
         else:
-            apply_convective_boundary(T, h, dx, rho, cp, dt, T_inf)
+            advance()
+        if snapshot_steps and step in snapshot_steps:
+            field_figs.append(save_field_snapshot(theta[0] + T_inf, snapshot_dir, f'd{diams_mm[0]}mm_t{step}'))
         if step % args.save_interval == 0 or step == steps-1:
-            stored_field = (T - T_inf).clamp(min=0)
-            stored = (stored_field * rho * cp * vol_elem).sum().item()
-            usable = max(0.0, stored - baseline_energy)
-            # Local (chamber + annulus) mask
-            annulus_factor = getattr(args, 'local_annulus_factor', 1.5)
-            r_local = r * annulus_factor
-            local_mask = (X - cx)**2 + (Y - cy)**2 <= r_local * r_local
-            local_stored = (stored_field[local_mask] * rho * cp * vol_elem).sum().item()
-            local_usable = max(0.0, local_stored)
-            eff_input = min(1.0, max(0.0, usable/total_input if total_input>0 else 0))
-            eff_loss = min(1.0, max(0.0, usable/(usable+conv_loss) if (usable+conv_loss)>0 else 0))
-            eff_input_local = min(1.0, max(0.0, local_usable/total_input if total_input>0 else 0))
-            eff_loss_local = min(1.0, max(0.0, local_usable/(local_usable+conv_loss) if (local_usable+conv_loss)>0 else 0))
-            times.append(step*dt); eff_series.append({'input_eff': eff_input, 'retained_vs_loss': eff_loss}); local_eff_series.append({'input_eff_local': eff_input_local,'retained_vs_loss_local': eff_loss_local}); maxTs.append(float(T.max().item())); stored_series.append(usable); loss_series.append(conv_loss)
-            if args.verbose:
-                print(f"Step {step:5d} | MaxT {maxTs[-1]:.1f}K | Glob η_in={eff_input*100:5.2f}% | Loc η_in={eff_input_local*100:5.2f}%")
-        # Safety: stop if runaway temperature reached
-        if float(T.max().item()) > args.max_temperature_cap:
+            alive_now = alive.tolist()
+            for b in range(B):
+                if not alive_now[b] and not stopped[b]:
+                    stopped[b] = True
+                    if args.verbose:
+                        print(f"[D={diams_mm[b]}mm] Stopped early before step {step} due to temperature cap {args.max_temperature_cap}K exceeded.")
+            if all(stopped):
+                break
+            conv_loss = conv_loss_t.double().cpu().numpy()
+            total_input = np.array(e_step) * steps_run.double().cpu().numpy()
+            # Energy reductions accumulate in FP32 whatever the field dtype
+            stored_field = theta.clamp(min=0).float()
+            stored = (stored_field.sum((-2, -1)) * k_energy).double().cpu().numpy()
+            local_stored = (torch.zeros(B, device=device).index_add_(0, local_member, stored_field.view(-1).index_select(0, local_idx)) * k_energy).double().cpu().numpy()
+            usable = np.maximum(stored - baseline_energy, 0.0)
+            local_usable = np.maximum(local_stored, 0.0)
+            sample = {'time_s': step * np.array(dts),
+                      'input_eff': efficiency(usable, total_input),
+                      'retained_vs_loss': efficiency(usable, usable + conv_loss),
+                      'input_eff_local': efficiency(local_usable, total_input),
+                      'retained_vs_loss_local': efficiency(local_usable, local_usable + conv_loss),
+                      'maxT': (theta.amax((-2, -1)).float() + T_inf).double().cpu().numpy(),
+                      'stored_J': usable, 'conv_loss_J': conv_loss}
+            rec = np.flatnonzero(~np.array(stopped))
+            for k in SERIES_KEYS:
+                series[k][rec, n_saved[rec]] = sample[k][rec]
+            n_saved[rec] += 1
             if args.verbose:
-                print(f"Stopping early at step {step} due to temperature cap {args.max_temperature_cap}K exceeded.")
-            break
-    return {
-        'diameter_mm': diam_mm,
-        'final_coupling_eff_input': eff_series[-1]['input_eff'],
-        'final_coupling_eff_loss': eff_series[-1]['retained_vs_loss'],
-        'final_local_eff_input': local_eff_series[-1]['input_eff_local'],
-        'final_local_eff_loss': local_eff_series[-1]['retained_vs_loss_local'],
-        'max_temperature_K': maxTs[-1],
-        'time_s': times,
-        'coupling_series': eff_series,
-        'local_coupling_series': local_eff_series,
-        'maxT_series': maxTs,
-        'total_input_J': total_input,
-        'conv_loss_J': conv_loss,
-        'retained_J': eff_series[-1]['input_eff']*total_input,
-        'stored_J_series': stored_series,
-        'conv_loss_J_series': loss_series
-    }
+                for b in rec:
+                    print(f"[D={diams_mm[b]}mm] Step {step:5d} | MaxT {sample['maxT'][b]:.1f}K | Glob η_in={sample['input_eff'][b]*100:5.2f}% | Loc η_in={sample['input_eff_local'][b]*100:5.2f}%")
+    if snapshot_steps and -1 in snapshot_steps:
+        field_figs.append(save_field_snapshot(theta[0] + T_inf, snapshot_dir, f'd{diams_mm[0]}mm_final'))
+    n_run = steps_run.tolist()
+    conv_loss = conv_loss_t.tolist()
+    results = []
+    for b in range(B):
+        total_input = e_step[b] * n_run[b]
+        s = {k: v[b, :n_saved[b]] for k, v in series.items()}
+        results.append({
+            'diameter_mm': diams_mm[b],
+            'final_coupling_eff_input': float(s['input_eff'][-1]),
+            'final_coupling_eff_loss': float(s['retained_vs_loss'][-1]),
+            'final_local_eff_input': float(s['input_eff_local'][-1]),
+            'final_local_eff_loss': float(s['retained_vs_loss_local'][-1]),
+            'max_temperature_K': float(s['maxT'][-1]),
+            'time_s': s['time_s'],
+            'coupling_series': {k: s[k] for k in ('input_eff', 'retained_vs_loss')},
+            'local_coupling_series': {k: s[k] for k in ('input_eff_local', 'retained_vs_loss_local')},
+            'maxT_series': s['maxT'],
+            'total_input_J': total_input,
+            'conv_loss_J': conv_loss[b],
+            'retained_J': float(s['input_eff'][-1])*total_input,
+            'stored_J_series': s['stored_J'],
+            'conv_loss_J_series': s['conv_loss_J']
+        })
+    if snapshot_steps:
+        results[0]['field_figs'] = field_figs
+    return results
+
+def run_sim(diam_mm: float, args, device, *, alpha=None, h=None, grid=None):
+    return run_batch([diam_mm], args, device,
+                     alphas=None if alpha is None else [alpha],
+                     hs=None if h is None else [h], grid=grid)[0]
 
 def plot_results(results, fig_dir, h):
     os.makedirs(fig_dir, exist_ok=True)
@@ -137,8 +444,8 @@ def plot_results(results, fig_dir, h):
     # Time-series efficiency plot for first diameter (assumes same sampling times)
     if results:
         t = results[0]['time_s']
-        glob = [pt['input_eff']*100 for pt in results[0]['coupling_series']]
-        loc = [pt['input_eff_local']*100 for pt in results[0]['local_coupling_series']]
+        glob = results[0]['coupling_series']['input_eff'] * 100
+        loc = results[0]['local_coupling_series']['input_eff_local'] * 100
         plt.figure(figsize=(6,4))
         plt.plot(t, glob, 'o-', lw=2, label='Global Stored/Input')
         plt.plot(t, loc, 's--', lw=2, label='Local Stored/Input')
@@ -150,9 +457,11 @@ def plot_results(results, fig_dir, h):
     return [f for f in [f1,f2,f3] if f]
 
 def save_field_snapshot(T_tensor, fig_dir, tag):
+    os.makedirs(fig_dir, exist_ok=True)
     set_pub_style()
     plt.figure(figsize=(4,4))
-    plt.imshow(T_tensor.cpu(), cmap='inferno')
+    # Matplotlib cannot read bf16 tensors
+    plt.imshow(T_tensor.float().cpu(), cmap='inferno')
     plt.colorbar(label='T (K)')
     plt.title(f'T Field {tag}')
     base=os.path.join(fig_dir, f'field_{tag}')
@@ -182,6 +491,12 @@ def main():
     ap.add_argument('--fig_dir', type=str, default='paper/figures/simulations')
     ap.add_argument('--device', type=str, default='auto')
     ap.add_argument('--verbose', action='store_true')
+    ap.add_argument('--dtype', choices=sorted(DTYPES), default='fp32', help='Storage precision of the temperature field; bf16 halves memory traffic but rounds away small per-step increments, so use it for quick sweeps only (energy sums stay FP32)')
+    ap.add_argument('--no_compile', action='store_true', help='Run the time step eagerly instead of through torch.compile')
+    ap.add_argument('--tile', type=int, default=64, help='Block edge (cells) for the Numba CPU kernel; 64x64 FP32 plus halo fits a 32 KB L1')
+    ap.add_argument('--no_cuda_graph', action='store_true', help='Launch the CUDA step kernels individually instead of replaying a captured graph')
+    ap.add_argument('--cuda_kernel', action='store_true', help='Use the hand-written shared-memory CUDA stencil (built with load_inline on first use) for FP32 CUDA runs, e.g. large refinement grids')
+    ap.add_argument('--no_numba', action='store_true', help='Use the PyTorch step on CPU even when Numba is installed')
     # New validation / uncertainty arguments
     ap.add_argument('--replicates', type=int, default=1, help='Number of replicate stochastic runs (with param jitter) per diameter')
     ap.add_argument('--param_jitter_frac', type=float, default=0.02, help='Std dev fraction for Gaussian jitter applied to h and alpha for uncertainty')
@@ -195,81 +510,30 @@ def main():
     global _SIM_THICKNESS_M
     _SIM_THICKNESS_M = args.thickness_mm * 1e-3
     results=[]
-    field_figs=[]
-    # Implement snapshot capture for smallest diameter by re-running with recording if needed
-    snapshot_diams = set()
-    want_snapshots = any(s >= 0 for s in args.snapshots) or (-1 in args.snapshots)
+    # All diameters and their jittered replicates run as one batch: member idx*R is the base
+    # run for diameter idx, members idx*R+1.. use Gaussian jitter on alpha and h.
+    R = max(1, args.replicates)
+    jitter = np.random.normal(0, args.param_jitter_frac, size=(len(args.diameters), R-1, 2))
+    scale = np.concatenate([np.ones((len(args.diameters), 1, 2)), 1.0 + jitter], axis=1)
+    member_diams = np.repeat(args.diameters, R).tolist()
+    # Field snapshots come from the first diameter's base run (member 0)
+    batch = run_batch(member_diams, args, device,
+                      alphas=(args.alpha * scale[..., 0]).ravel(), hs=(args.h * scale[..., 1]).ravel(),
+                      snapshot_steps=set(args.snapshots), snapshot_dir=args.fig_dir)
+    field_figs = batch[0].get('field_figs', [])
+    # Grid refinement runs share one refined grid, so they form a second batch
+    refined_grid = int(args.grid * args.refine_factor)
+    refine_diams = [d for d in dict.fromkeys(args.diameters) if d in args.refine_diameters]
+    refined = dict(zip(refine_diams, run_batch(refine_diams, args, device, grid=refined_grid))) if refine_diams else {}
     for idx, d in enumerate(args.diameters):
-        if idx==0 and want_snapshots:
-            # temporary inline recorder: run simulation while storing specified steps
-            Lx = args.domain_mm * 1e-3
-            nx = ny = args.grid
-            dx = Lx / nx
-            alpha, rho, cp, h = args.alpha, args.rho, args.cp, args.h
-            T_inf, power_W, steps = args.ambient_K, args.power_W, args.steps
-            diam = d * 1e-3
-            dt = min(stability_dt(dx, alpha), args.dt)
-            T = torch.full((nx, ny), T_inf, device=device)
-            x = torch.linspace(0, Lx, nx, device=device)
-            y = torch.linspace(0, Lx, ny, device=device)
-            X, Y = torch.meshgrid(x, y, indexing='ij')
-            cx = cy = Lx/2
-            r = diam/2
-            chamber_mask = (X - cx)**2 + (Y - cy)**2 <= r*r
-            area = math.pi * r * r
-            thickness = _SIM_THICKNESS_M
-            q_vol = power_W / (area * thickness)
-            source_coeff = q_vol / (rho * cp)
-            kernel = torch.tensor([[0.,1.,0.],[1.,-4.,1.],[0.,1.,0.]], device=device).view(1,1,3,3)
-            vol_elem = dx * dx * thickness
-            total_input = 0.0; conv_loss=0.0; baseline_energy=0.0
-            boundary_mask = torch.zeros_like(T, dtype=torch.bool)
-            boundary_mask[0,:]=True; boundary_mask[-1,:]=True; boundary_mask[:,0]=True; boundary_mask[:,-1]=True
-            snapshot_steps = set([s for s in args.snapshots if s>=0])
-            for step in range(steps):
-                T[chamber_mask] += source_coeff * dt
-                total_input += power_W * dt
-                lap = torch.nn.functional.conv2d(T.unsqueeze(0).unsqueeze(0), kernel, padding=1).squeeze()
-                T = T + alpha * dt / (dx * dx) * lap
-                if h>0:
-                    E_before = ((T[boundary_mask]-T_inf) * rho * cp * vol_elem).sum().item()
-                    apply_convective_boundary(T, h, dx, rho, cp, dt, T_inf)
-                    E_after = ((T[boundary_mask]-T_inf) * rho * cp * vol_elem).sum().item()
-                    delta = E_before - E_after
-                    if delta>0: conv_loss += delta
-                else:
-                    apply_convective_boundary(T, h, dx, rho, cp, dt, T_inf)
-                if step in snapshot_steps:
-                    tag=f'd{d}mm_t{step}'
-                    fp=save_field_snapshot(T, args.fig_dir, tag)
-                    field_figs.append(fp)
-            # final snapshot
-            if -1 in args.snapshots:
-                tag=f'd{d}mm_final'
-                fp=save_field_snapshot(T, args.fig_dir, tag)
-                field_figs.append(fp)
-            # compute metrics equivalent to run_sim for consistency (reuse code path by calling run_sim to avoid divergence)
-            res = run_sim(d, args, device)
-        else:
-            res = run_sim(d, args, device)
+        res = batch[idx*R]
 
         # Replicates with jitter for uncertainty quantification
         if args.replicates > 1:
-            glob_eff=[]; loc_eff=[]
-            for r_id in range(args.replicates-1):  # already have one base run
-                jitter_alpha = args.alpha * (1.0 + np.random.normal(0, args.param_jitter_frac))
-                jitter_h = args.h * (1.0 + np.random.normal(0, args.param_jitter_frac))
-                jitter_args = copy.deepcopy(args)
-                jitter_args.alpha = float(jitter_alpha)
-                jitter_args.h = float(jitter_h)
-                jitter_res = run_sim(d, jitter_args, device)
-                glob_eff.append(jitter_res['final_coupling_eff_input'])
-                loc_eff.append(jitter_res['final_local_eff_input'])
-            # include base run
-            glob_eff.append(res['final_coupling_eff_input'])
-            loc_eff.append(res['final_local_eff_input'])
-            mean_glob = float(np.mean(glob_eff)); std_glob = float(np.std(glob_eff))
-            mean_loc = float(np.mean(loc_eff)); std_loc = float(np.std(loc_eff))
+            glob_eff = np.array([m['final_coupling_eff_input'] for m in batch[idx*R:(idx+1)*R]])
+            loc_eff = np.array([m['final_local_eff_input'] for m in batch[idx*R:(idx+1)*R]])
+            mean_glob = float(glob_eff.mean()); std_glob = float(glob_eff.std())
+            mean_loc = float(loc_eff.mean()); std_loc = float(loc_eff.std())
             res['replicate_stats']={
                 'global_input_eff_mean': mean_glob,
                 'global_input_eff_std': std_glob,
@@ -282,12 +546,10 @@ def main():
 
         # Optional grid refinement study
         if d in args.refine_diameters:
-            refine_args = copy.deepcopy(args)
-            refine_args.grid = int(refine_args.grid * args.refine_factor)
-            refine_res = run_sim(d, refine_args, device)
+            refine_res = refined[d]
             res['refine']={
                 'grid': args.grid,
-                'refined_grid': refine_args.grid,
+                'refined_grid': refined_grid,
                 'base_eff': res['final_coupling_eff_input'],
                 'refined_eff': refine_res['final_coupling_eff_input'],
                 'abs_diff': abs(refine_res['final_coupling_eff_input'] - res['final_coupling_eff_input']),
@@ -1,15 +1,15 @@
 """
 Create professional beetle architecture diagram to replace ASCII art
+
+The diagram is a fixed set of shapes, so it is written directly as SVG (no plotting
+library). A PDF copy is produced with cairosvg when it is installed.
 """
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import FancyBboxPatch, Ellipse, Rectangle, Polygon
-import numpy as np
+import os
+import math
+from xml.sax.saxutils import escape
 
-# Set up the figure with modern style
-plt.style.use('seaborn-v0_8-darkgrid')
-fig = plt.figure(figsize=(14, 10))
+OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'paper', 'figures')
 
 # Define consistent color scheme
 colors = {
@@ -21,129 +21,196 @@ colors = {
     'text': '#2C3E50'        # Dark blue-gray
 }
 
-# Create two subplots - top view and side view
-ax1 = plt.subplot(2, 1, 1)
-ax2 = plt.subplot(2, 1, 2)
+SCALE = 90      # SVG units per diagram unit
+MARGIN = 50
+TITLE_H = 40
+WIDTH = 10 * SCALE + 2 * MARGIN
+
+class Panel:
+    """A titled drawing area with diagram coordinates (0..10 x 0..height, y up)."""
+
+    def __init__(self, top, height, title):
+        self.top = top + TITLE_H
+        self.height = height
+        self.elements = [
+            f'<text x="{WIDTH / 2}" y="{top + TITLE_H * 0.7}" text-anchor="middle" font-size="20" '
+            f'font-weight="bold" fill="{colors["text"]}">{escape(title)}</text>'
+        ]
+
+    @property
+    def bottom(self):
+        return self.top + self.height * SCALE
+
+    def pt(self, x, y):
+        return MARGIN + x * SCALE, self.top + (self.height - y) * SCALE
+
+    def points(self, pts):
+        return ' '.join('%.1f,%.1f' % self.pt(x, y) for x, y in pts)
+
+    def ellipse(self, x, y, w, h, style):
+        cx, cy = self.pt(x, y)
+        self.elements.append(f'<ellipse cx="{cx}" cy="{cy}" rx="{w * SCALE / 2}" ry="{h * SCALE / 2}" {style}/>')
+
+    def circle(self, x, y, r, style, units=True):
+        cx, cy = self.pt(x, y)
+        self.elements.append(f'<circle cx="{cx}" cy="{cy}" r="{r * SCALE if units else r}" {style}/>')
+
+    def rect(self, x, y, w, h, style, rounding=0.0):
+        px, py = self.pt(x, y + h)
+        self.elements.append(f'<rect x="{px}" y="{py}" width="{w * SCALE}" height="{h * SCALE}" '
+                             f'rx="{rounding * SCALE}" {style}/>')
+
+    def polygon(self, pts, style):
+        self.elements.append(f'<polygon points="{self.points(pts)}" {style}/>')
+
+    def line(self, x1, y1, x2, y2, style):
+        (px1, py1), (px2, py2) = self.pt(x1, y1), self.pt(x2, y2)
+        self.elements.append(f'<line x1="{px1}" y1="{py1}" x2="{px2}" y2="{py2}" {style}/>')
+
+    def text(self, x, y, label, size, color='black', anchor='middle', va='center', extra=''):
+        lines = label.split('\n')
+        line_h = size * 1.5
+        px, py = self.pt(x, y)
+        if va == 'center':
+            py -= (len(lines) - 1) * line_h / 2 - size * 0.35
+        else:  # baseline of the last line at y
+            py -= (len(lines) - 1) * line_h
+        spans = ''.join(f'<tspan x="{px}" dy="{0 if i == 0 else line_h}">{escape(l)}</tspan>'
+                        for i, l in enumerate(lines))
+        self.elements.append(f'<text x="{px}" y="{py}" font-size="{size}" fill="{color}" '
+                             f'text-anchor="{anchor}" {extra}>{spans}</text>')
+
+def fill(color, opacity, stroke=None, width=0):
+    style = f'fill="{color}" fill-opacity="{opacity}"'
+    if stroke:
+        style += f' stroke="{stroke}" stroke-width="{width}"'
+    return style
+
+def stroke(color, width, opacity=1.0, markers=''):
+    return f'fill="none" stroke="{color}" stroke-width="{width}" stroke-opacity="{opacity}" {markers}'
 
 # TOP VIEW
-ax1.set_xlim(0, 10)
-ax1.set_ylim(0, 8)
-ax1.set_aspect('equal')
-ax1.axis('off')
-ax1.set_title('TOP VIEW - Integrated System Architecture', fontsize=14, fontweight='bold', color=colors['text'])
+top = Panel(0, 8, 'TOP VIEW - Integrated System Architecture')
 
 # Main body outline (beetle shape)
-beetle_body = Ellipse((5, 4), 6, 4, facecolor='none', edgecolor=colors['text'], linewidth=2)
-ax1.add_patch(beetle_body)
+top.ellipse(5, 4, 6, 4, stroke(colors['text'], 2))
 
 # Solar carapace
-solar_patch = Ellipse((5, 4), 5.5, 3.5, facecolor=colors['solar'], alpha=0.3, edgecolor=colors['solar'], linewidth=2)
-ax1.add_patch(solar_patch)
-ax1.text(5, 6, 'Solar Carapace\n1500 cm²\n20% efficiency', ha='center', va='center', fontsize=10, fontweight='bold')
+top.ellipse(5, 4, 5.5, 3.5, fill(colors['solar'], 0.3, colors['solar'], 2))
+top.text(5, 6, 'Solar Carapace\n1500 cm²\n20% efficiency', 13, extra='font-weight="bold"')
 
-# Flow lattice core
-lattice_rect = FancyBboxPatch((2.5, 2.5), 5, 3, boxstyle="round,pad=0.1", 
-                              facecolor=colors['lattice'], alpha=0.3, edgecolor=colors['lattice'], linewidth=2)
-ax1.add_patch(lattice_rect)
+# Flow lattice core (rounded box with 0.1 padding)
+top.rect(2.4, 2.4, 5.2, 3.2, fill(colors['lattice'], 0.3, colors['lattice'], 2), rounding=0.1)
 
 # Hexagonal pattern inside lattice
 for i in range(3, 8):
     for j in range(2, 6):
         if (i + j) % 2 == 0:
-            hex_x = i * 0.6
-            hex_y = j * 0.6
-            hexagon = patches.RegularPolygon((hex_x, hex_y), 6, radius=0.2, 
-                                            facecolor='none', edgecolor=colors['lattice'], linewidth=0.5)
-            ax1.add_patch(hexagon)
+            hex_x, hex_y = i * 0.6, j * 0.6
+            top.polygon([(hex_x + 0.2 * math.cos(math.pi / 2 + k * math.pi / 3),
+                          hex_y + 0.2 * math.sin(math.pi / 2 + k * math.pi / 3)) for k in range(6)],
+                        stroke(colors['lattice'], 0.5))
 
-ax1.text(5, 4, 'Multi-Functional\nFlow Lattice\n>1000 micro-chambers\n70% porosity', 
-         ha='center', va='center', fontsize=9, style='italic')
+top.text(5, 4, 'Multi-Functional\nFlow Lattice\n>1000 micro-chambers\n70% porosity', 12,
+         extra='font-style="italic"')
 
 # Bio-reactors (distributed)
 for x, y in [(3, 3), (7, 3), (3.5, 5), (6.5, 5)]:
-    bio = plt.Circle((x, y), 0.3, facecolor=colors['bio'], alpha=0.5, edgecolor=colors['bio'], linewidth=1)
-    ax1.add_patch(bio)
+    top.circle(x, y, 0.3, fill(colors['bio'], 0.5, colors['bio'], 1))
 
-ax1.text(2, 2.5, 'Bio-reactors\n2-5L total', ha='center', fontsize=8, color=colors['bio'])
+top.text(2, 2.5, 'Bio-reactors\n2-5L total', 11, colors['bio'], va='baseline')
 
 # Processor location
-processor = Rectangle((4.5, 3.5), 1, 1, facecolor=colors['processor'], alpha=0.5, edgecolor=colors['processor'], linewidth=2)
-ax1.add_patch(processor)
-ax1.text(5, 3, 'Snapdragon\n5-15W', ha='center', fontsize=8, color=colors['processor'], fontweight='bold')
+top.rect(4.5, 3.5, 1, 1, fill(colors['processor'], 0.5, colors['processor'], 2))
+top.text(5, 3, 'Snapdragon\n5-15W', 11, colors['processor'], va='baseline', extra='font-weight="bold"')
 
 # Six legs (beetle-style)
 leg_positions = [(1.5, 5), (1.5, 3), (1.5, 1), (8.5, 5), (8.5, 3), (8.5, 1)]
 for x, y in leg_positions:
-    ax1.plot([5, x], [4, y], 'k-', linewidth=2, alpha=0.7)
-    ax1.plot(x, y, 'ko', markersize=8)
+    top.line(5, 4, x, y, stroke('black', 2, 0.7))
+    top.circle(x, y, 5, 'fill="black"', units=False)
 
-ax1.text(1, 0.5, '6 × Nitinol\nActuated Legs', ha='center', fontsize=8, color=colors['structure'])
+top.text(1, 0.5, '6 × Nitinol\nActuated Legs', 11, colors['structure'], va='baseline')
 
 # Component labels with lines
-ax1.annotate('Tesla/Vortex Valves', xy=(6, 4.5), xytext=(8.5, 6.5),
-            arrowprops=dict(arrowstyle='->', color=colors['text'], alpha=0.5),
-            fontsize=8, color=colors['text'])
-
-ax1.annotate('Acoustic Resonators', xy=(4, 4.5), xytext=(1.5, 6.5),
-            arrowprops=dict(arrowstyle='->', color=colors['text'], alpha=0.5),
-            fontsize=8, color=colors['text'])
+arrow = 'marker-end="url(#arrow)"'
+for label, (x, y), (tx, ty) in [('Tesla/Vortex Valves', (6, 4.5), (8.5, 6.5)),
+                                ('Acoustic Resonators', (4, 4.5), (1.5, 6.5))]:
+    top.line(tx, ty, x, y, stroke(colors['text'], 1, 0.5, arrow))
+    top.text(tx, ty, label, 11, colors['text'], anchor='start', va='baseline')
 
 # SIDE VIEW
-ax2.set_xlim(0, 10)
-ax2.set_ylim(0, 6)
-ax2.set_aspect('equal')
-ax2.axis('off')
-ax2.set_title('SIDE VIEW - Beetle Profile (25cm height)', fontsize=14, fontweight='bold', color=colors['text'])
+side = Panel(top.bottom + 20, 6, 'SIDE VIEW - Beetle Profile (25cm height)')
 
 # Beetle side profile (more realistic)
 # Body
-body_points = np.array([
-    [2, 2], [2, 3.5], [3, 4.5], [5, 5], [7, 4.5], [8, 3.5], [8, 2]
-])
-body_polygon = Polygon(body_points, closed=True, facecolor='lightgray', edgecolor=colors['text'], linewidth=2)
-ax2.add_patch(body_polygon)
+body_points = [(2, 2), (2, 3.5), (3, 4.5), (5, 5), (7, 4.5), (8, 3.5), (8, 2)]
+side.polygon(body_points, fill('lightgray', 1.0, colors['text'], 2))
 
 # Solar carapace (top curve)
-carapace_x = np.linspace(2, 8, 100)
-carapace_y = 4.5 - 0.5 * ((carapace_x - 5) / 3) ** 2
-ax2.fill_between(carapace_x, carapace_y, 5, alpha=0.3, color=colors['solar'], edgecolor=colors['solar'], linewidth=2)
-ax2.text(5, 4.7, 'Solar Carapace', ha='center', fontsize=10, fontweight='bold', color=colors['solar'])
+carapace = [(2 + 6 * k / 49, 4.5 - 0.5 * ((6 * k / 49 - 3) / 3) ** 2) for k in range(50)]
+side.polygon(carapace + [(8, 5), (2, 5)], fill(colors['solar'], 0.3, colors['solar'], 2))
+side.text(5, 4.7, 'Solar Carapace', 13, colors['solar'], va='baseline', extra='font-weight="bold"')
 
 # Flow lattice layer
-ax2.fill_between([2.5, 7.5], [2.5, 2.5], [4, 4], alpha=0.3, color=colors['lattice'])
-ax2.text(5, 3.2, 'Flow Lattice Core', ha='center', fontsize=10, color=colors['lattice'], fontweight='bold')
+side.rect(2.5, 2.5, 5, 1.5, fill(colors['lattice'], 0.3))
+side.text(5, 3.2, 'Flow Lattice Core', 13, colors['lattice'], va='baseline', extra='font-weight="bold"')
 
 # Bio-reactors layer
-ax2.fill_between([3, 7], [2.2, 2.2], [2.8, 2.8], alpha=0.5, color=colors['bio'])
-ax2.text(5, 2.5, 'Bio-reactors', ha='center', fontsize=9, color=colors['bio'])
+side.rect(3, 2.2, 4, 0.6, fill(colors['bio'], 0.5))
+side.text(5, 2.5, 'Bio-reactors', 12, colors['bio'], va='baseline')
 
 # Legs
 leg_x = [2.5, 4, 5, 6, 7.5]
 for x in leg_x:
     # Upper segment
-    ax2.plot([x, x-0.3], [2, 1], 'k-', linewidth=3)
-    # Lower segment  
-    ax2.plot([x-0.3, x-0.5], [1, 0.2], 'k-', linewidth=3)
+    side.line(x, 2, x - 0.3, 1, stroke('black', 3))
+    # Lower segment
+    side.line(x - 0.3, 1, x - 0.5, 0.2, stroke('black', 3))
     # Joint
-    ax2.plot(x-0.3, 1, 'ko', markersize=6)
+    side.circle(x - 0.3, 1, 4, 'fill="black"', units=False)
 
-ax2.text(5, 0.5, '6 Articulated Legs\nCarbon Fiber + Nitinol', ha='center', fontsize=9, color=colors['structure'])
+side.text(5, 0.5, '6 Articulated Legs\nCarbon Fiber + Nitinol', 12, colors['structure'], va='baseline')
 
 # Dimensions
-ax2.annotate('', xy=(8.5, 2), xytext=(8.5, 5),
-            arrowprops=dict(arrowstyle='<->', color='gray', lw=1))
-ax2.text(8.8, 3.5, '25 cm', rotation=90, va='center', fontsize=9, color='gray')
+both_ends = 'marker-start="url(#arrow-gray)" marker-end="url(#arrow-gray)"'
+side.line(8.5, 5, 8.5, 2, stroke('gray', 1, markers=both_ends))
+px, py = side.pt(8.8, 3.5)
+side.text(8.8, 3.5, '25 cm', 12, 'gray', extra=f'transform="rotate(-90 {px} {py})"')
 
-ax2.annotate('', xy=(2, 1.5), xytext=(8, 1.5),
-            arrowprops=dict(arrowstyle='<->', color='gray', lw=1))
-ax2.text(5, 1.2, '50 cm', ha='center', fontsize=9, color='gray')
+side.line(2, 1.5, 8, 1.5, stroke('gray', 1, markers=both_ends))
+side.text(5, 1.2, '50 cm', 12, 'gray', va='baseline')
 
 # Mass indicator
-ax2.text(1, 3, '8-15 kg\ntotal mass', ha='center', fontsize=9, 
-         bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor='gray'))
+side.rect(0.45, 2.55, 1.1, 0.75, fill('white', 1.0, 'gray', 1), rounding=0.1)
+side.text(1, 3, '8-15 kg\ntotal mass', 12)
+
+height = side.bottom + MARGIN
+svg = '\n'.join([
+    f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+    f'viewBox="0 0 {WIDTH} {height}" font-family="DejaVu Sans, Arial, sans-serif">',
+    '<defs>',
+    f'<marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+    f'orient="auto-start-reverse"><path d="M0,0 L10,5 L0,10" fill="none" stroke="{colors["text"]}"/></marker>',
+    '<marker id="arrow-gray" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+    'orient="auto-start-reverse"><path d="M0,0 L10,5 L0,10" fill="none" stroke="gray"/></marker>',
+    '</defs>',
+    f'<rect width="{WIDTH}" height="{height}" fill="white"/>',
+    *top.elements,
+    *side.elements,
+    '</svg>',
+])
+
+os.makedirs(OUT_DIR, exist_ok=True)
+svg_path = os.path.join(OUT_DIR, 'beetle_architecture.svg')
+with open(svg_path, 'w', encoding='utf-8') as f:
+    f.write(svg)
+
+try:
+    import cairosvg
+except (ImportError, OSError):  # OSError: package present but the cairo library is not
+    cairosvg = None
+if cairosvg is not None:
+    cairosvg.svg2pdf(bytestring=svg.encode('utf-8'), write_to=os.path.join(OUT_DIR, 'beetle_architecture.pdf'))
 
-plt.tight_layout()
-plt.savefig('C:/Users/Jay/My Drive/ROBOTICS/TB/paper/figures/beetle_architecture.png', dpi=300, bbox_inches='tight')
-plt.savefig('C:/Users/Jay/My Drive/ROBOTICS/TB/paper/figures/beetle_architecture.pdf', bbox_inches='tight')
 print("Beetle architecture diagram created successfully!")
-plt.show()
\ No newline at end of file
@@ -14,65 +14,202 @@ Outputs percentiles and failure probability (net < 0).
 Future: introduce correlations, time-series storage, seasonal variation.
 """
 from __future__ import annotations
-import argparse, os, math, random, statistics
+import argparse, os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import warnings
+from scipy.stats import truncnorm, lognorm, beta, qmc
+import matplotlib
+matplotlib.use('Agg')  # files only; also safe to import in worker processes
 import matplotlib.pyplot as plt
 from sim_utils import build_metadata, save_results, register_figure
+try:
+    import numba
+except ImportError:
+    numba = None
 
-def truncated_normal(mu, sigma):
-    while True:
-        x = random.gauss(mu, sigma)
-        if x >= 0:
-            return x
-
-def run_mc(n_samples: int, params):
-    vals = []
-    for _ in range(n_samples):
-        # Optionally impose adversarial correlation pattern:
-        # - Low solar S coincides with low biomass B and high actuator duty D (worst-case net energy)
-        # Implemented by drawing a shared latent u and mapping to tails.
-        if getattr(params, 'adverse_correlation', False):
-            u = random.random()
-            # Skew solar lower (invert CDF quantile weighting)
-            S = truncated_normal(params.mu_S, params.sigma_S) * (0.3 + 0.7*u)  # scaled by u (favor lower average)
-            # Biomass: lognormal, bias toward lower by mixing with u
-            base_ln = random.gauss(params.mu_B, params.sigma_B)
-            B = math.exp(base_ln) * (0.3 + 0.7*u)
-            # Actuator: higher when solar is low -> use (1-u)
-            # Generate beta via inverse-gamma trick but modulate shape
-            D = random.gammavariate(params.a_D, 1) / (random.gammavariate(params.a_D,1) + random.gammavariate(params.b_D,1))
+BACKENDS = ('numpy', 'numba', 'python')
+CAPACITY_PARAMS = ('solar_capacity_kWh', 'biomass_capacity_kWh', 'actuator_load_kWh', 'parasitic_load_kWh')
+
+def _mc_loop(n, mu_S, sigma_S, mu_B, sigma_B, a_D, b_D, solar, biomass, actuator, parasitic, adverse, seed):
+    """Scalar per-sample loop; compiled by Numba for the 'numba' backend, run as-is for 'python'."""
+    np.random.seed(seed)
+    out = np.empty(n)
+    for i in range(n):
+        S = np.random.normal(mu_S, sigma_S)
+        while S < 0:
+            S = np.random.normal(mu_S, sigma_S)
+        B = np.random.lognormal(mu_B, sigma_B)
+        D = np.random.beta(a_D, b_D)
+        if adverse:
+            u = np.random.random()
+            S *= 0.3 + 0.7*u
+            B *= 0.3 + 0.7*u
             D = min(0.999, max(0.0, 0.5*D + 0.5*(1-u)))
-        else:
-            S = truncated_normal(params.mu_S, params.sigma_S)
-            B = math.exp(random.gauss(params.mu_B, params.sigma_B))  # lognormal
-            # Beta(a,b)
-            D = random.gammavariate(params.a_D, 1) / (random.gammavariate(params.a_D,1) + random.gammavariate(params.b_D,1))
-        net = (S * params.solar_capacity_kWh + B * params.biomass_capacity_kWh) - (D * params.actuator_load_kWh + params.parasitic_load_kWh)
-        vals.append(net)
-    return vals
-
-def summarize(vals):
-    arr = sorted(vals)
-    n = len(arr)
-    def pct(p):
-        k = int(p/100 * (n-1))
-        return arr[k]
-    failure_prob = sum(1 for v in arr if v < 0)/n
+        out[i] = (S * solar + B * biomass) - (D * actuator + parasitic)
+    return out
+
+_mc_loop_njit = numba.njit(cache=True)(_mc_loop) if numba is not None else None
+
+def run_mc(n_samples: int, params, rng=None):
+    """Draw all samples at once; returns the net energy (kWh) as an ndarray."""
+    rng = np.random.default_rng() if rng is None else rng
+    backend = getattr(params, 'backend', 'numpy')
+    if backend != 'numpy':
+        loop = _mc_loop_njit if backend == 'numba' else _mc_loop
+        # The loop seeds NumPy's legacy global RNG; derive its seed from rng to stay reproducible
+        return loop(n_samples, params.mu_S, params.sigma_S, params.mu_B, params.sigma_B, params.a_D, params.b_D,
+                    params.solar_capacity_kWh, params.biomass_capacity_kWh, params.actuator_load_kWh,
+                    params.parasitic_load_kWh, bool(getattr(params, 'adverse_correlation', False)),
+                    int(rng.integers(2**31)))
+    return net_energy(*draw_inputs(n_samples, params, rng), *capacities(params))
+
+def draw_inputs(n_samples: int, params, rng):
+    """Sample the stochastic factors (S, B, D) as arrays of length n_samples."""
+    adverse = getattr(params, 'adverse_correlation', False)
+    if getattr(params, 'qmc', False):
+        # Scrambled Sobol' points mapped through each marginal's inverse CDF
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='.*balance properties of Sobol')
+            q = qmc.Sobol(d=4 if adverse else 3, seed=rng).random(n_samples)
+        S = truncnorm.ppf(q[:, 0], -params.mu_S / params.sigma_S, np.inf, loc=params.mu_S, scale=params.sigma_S)
+        B = lognorm.ppf(q[:, 1], params.sigma_B, scale=np.exp(params.mu_B))
+        D = beta.ppf(q[:, 2], params.a_D, params.b_D)
+    else:
+        # Normal truncated at 0, sampled by inverse CDF in one call
+        S = truncnorm.rvs(-params.mu_S / params.sigma_S, np.inf, loc=params.mu_S, scale=params.sigma_S,
+                          size=n_samples, random_state=rng)
+        B = rng.lognormal(params.mu_B, params.sigma_B, n_samples)
+        # True Beta(a_D, b_D); the old gamma(a)/(gamma(a)' + gamma(b)) ratio had mean ~1/3 and could exceed 1
+        D = rng.beta(params.a_D, params.b_D, n_samples)
+    # Optionally impose adversarial correlation pattern:
+    # - Low solar S coincides with low biomass B and high actuator duty D (worst-case net energy)
+    # Implemented by drawing a shared latent u and mapping to tails.
+    if adverse:
+        u = q[:, 3] if getattr(params, 'qmc', False) else rng.random(n_samples)
+        S *= 0.3 + 0.7*u  # scaled by u (favor lower average)
+        B *= 0.3 + 0.7*u  # biomass biased toward lower by mixing with u
+        # Actuator: higher when solar is low -> use (1-u)
+        D = np.clip(0.5*D + 0.5*(1-u), 0.0, 0.999)
+    return S, B, D
+
+def net_energy(S, B, D, solar, biomass, actuator, parasitic):
+    return (S * solar + B * biomass) - (D * actuator + parasitic)
+
+def capacities(params):
+    return tuple(getattr(params, p) for p in CAPACITY_PARAMS)
+
+class NetEnergySketch:
+    """Mergeable running summary of net-energy samples in bounded memory.
+
+    Count, failures, mean and std are exact; percentiles come from a histogram with bins of
+    `resolution` kWh and are accurate to half a bin. Memory scales with the sampled range
+    over the resolution, not with the number of samples.
+    """
+
+    def __init__(self, resolution=1e-4):
+        self.resolution = resolution
+        self.n = self.fails = 0
+        self.total = self.total_sq = 0.0
+        self.offset = 0  # bin index of counts[0]
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _add_counts(self, offset, counts):
+        if not self.counts.size:
+            self.offset, self.counts = offset, counts
+            return
+        lo = min(self.offset, offset)
+        merged = np.zeros(max(self.offset + self.counts.size, offset + counts.size) - lo, dtype=np.int64)
+        merged[self.offset - lo:self.offset - lo + self.counts.size] += self.counts
+        merged[offset - lo:offset - lo + counts.size] += counts
+        self.offset, self.counts = lo, merged
+
+    def update(self, x):
+        idx = np.floor(x / self.resolution).astype(np.int64)
+        lo = int(idx.min())
+        self._add_counts(lo, np.bincount(idx - lo).astype(np.int64))
+        self.n += x.size
+        self.fails += int((x < 0).sum())
+        self.total += float(x.sum())
+        self.total_sq += float(np.dot(x, x))
+        return self
+
+    def merge(self, other):
+        self._add_counts(other.offset, other.counts)
+        self.n += other.n
+        self.fails += other.fails
+        self.total += other.total
+        self.total_sq += other.total_sq
+        return self
+
+    def bin_centers(self):
+        return (self.offset + np.arange(self.counts.size) + 0.5) * self.resolution
+
+    def percentile(self, p):
+        # Same rank as the floor-index order statistic of the full sample
+        rank = int(p/100 * (self.n-1))
+        return float(self.bin_centers()[np.searchsorted(np.cumsum(self.counts), rank, side='right')])
+
+def _batches(n_samples, batch_size):
+    while n_samples > 0:
+        yield min(batch_size, n_samples)
+        n_samples -= batch_size
+
+def _mc_chunk(n_samples, params, seed):
+    """Process-pool worker: one independently seeded shard of a run, folded into a sketch batch by batch."""
+    params, rng = argparse.Namespace(**params), np.random.default_rng(seed)
+    sketch = NetEnergySketch(params.resolution)
+    for n in _batches(n_samples, params.batch_size):
+        sketch.update(run_mc(n, params, rng))
+    return sketch
+
+def _sensitivity_chunk(n_samples, params, seed, coeffs):
+    """Process-pool worker: one shared draw evaluated under each capacity tuple (common random numbers)."""
+    params, rng = argparse.Namespace(**params), np.random.default_rng(seed)
+    sketches = [NetEnergySketch(params.resolution) for _ in coeffs]
+    for n in _batches(n_samples, params.batch_size):
+        S, B, D = draw_inputs(n, params, rng)
+        for sketch, c in zip(sketches, coeffs):
+            sketch.update(net_energy(S, B, D, *c))
+    return sketches
+
+def submit_mc(pool, n_samples, params, seed, shards, worker=_mc_chunk, *extra):
+    """Split a run into `shards` chunks with child seeds spawned from `seed`; returns the futures."""
+    sizes = np.diff(np.linspace(0, n_samples, shards + 1).astype(int))
+    return [pool.submit(worker, int(n), dict(vars(params)), child, *extra) for n, child in zip(sizes, seed.spawn(shards))]
+
+def gather(futures):
+    """Merge the sketches (or per-coefficient lists of sketches) returned by the shards."""
+    results = [f.result() for f in futures]
+    if isinstance(results[0], list):
+        return [gather_one(column) for column in zip(*results)]
+    return gather_one(results)
+
+def gather_one(sketches):
+    merged = NetEnergySketch(sketches[0].resolution)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+def summarize(sketch):
+    mean = sketch.total / sketch.n
     return {
-        'P5': pct(5), 'P50': pct(50), 'P95': pct(95), 'failure_prob': failure_prob,
-        'mean': statistics.mean(arr), 'std': statistics.pstdev(arr)
+        'P5': sketch.percentile(5), 'P50': sketch.percentile(50), 'P95': sketch.percentile(95),
+        'failure_prob': sketch.fails / sketch.n,
+        'mean': mean, 'std': float(np.sqrt(max(sketch.total_sq / sketch.n - mean * mean, 0.0)))
     }
 
-def plot_hist(vals, fig_dir):
+def plot_hist(sketch, fig_dir):
     os.makedirs(fig_dir, exist_ok=True)
-    plt.figure(figsize=(6,4))
-    plt.hist(vals, bins=40, color='slateblue', alpha=0.85)
-    plt.xlabel('Daily Net Energy (kWh)')
-    plt.ylabel('Count')
-    plt.title('Net Energy Distribution')
-    plt.grid(alpha=.3)
+    fig, ax = plt.subplots(figsize=(6,4))
+    # Re-bin the sketch's fine histogram into 40 display bins
+    ax.hist(sketch.bin_centers(), bins=40, weights=sketch.counts, color='slateblue', alpha=0.85)
+    ax.set_xlabel('Daily Net Energy (kWh)')
+    ax.set_ylabel('Count')
+    ax.set_title('Net Energy Distribution')
+    ax.grid(alpha=.3)
     fig1 = os.path.join(fig_dir, 'energy_surplus_hist.png')
-    plt.tight_layout(); plt.savefig(fig1, dpi=140); plt.close()
+    fig.tight_layout(); fig.savefig(fig1, dpi=140); plt.close(fig)
     return fig1
 
 def main():
@@ -95,41 +232,67 @@ def main():
     ap.add_argument('--sensitivity', action='store_true', help='Perform one-at-a-time sensitivity sweep (±10%) for key parameters')
     ap.add_argument('--adverse_correlation', action='store_true', help='Enable adversarial correlation stress test (low generation aligned with high loads)')
     ap.add_argument('--compare_adverse', action='store_true', help='If set, run both independent and adverse correlation scenarios and report delta in failure probability')
+    ap.add_argument('--backend', choices=BACKENDS, default='numpy', help='Sampler: vectorized NumPy, Numba-compiled scalar loop, or the same loop in pure Python')
+    ap.add_argument('--workers', type=int, default=0, help='Worker processes in the pool (0 = all cores); does not affect results')
+    ap.add_argument('--shards', type=int, default=16, help='Independently seeded chunks each run is split into; results depend on --seed and --shards')
+    ap.add_argument('--qmc', action='store_true', help="Quasi-Monte Carlo: scrambled Sobol' points through inverse CDFs (numpy backend; chunk sizes that are powers of two balance best)")
+    ap.add_argument('--batch_size', type=int, default=2**20, help='Samples generated per batch; results are folded into a summary sketch so memory stays bounded')
+    ap.add_argument('--resolution', type=float, default=1e-4, help='Percentile resolution (kWh): bin width of the streaming histogram')
     args = ap.parse_args()
-    random.seed(args.seed)
-    vals = run_mc(args.samples, args)
-    stats = summarize(vals)
-    fig1 = plot_hist(vals, args.fig_dir)
-    adverse_delta = None
-    adverse_stats = None
-    if args.compare_adverse and not args.adverse_correlation:
-        adverse_args = argparse.Namespace(**vars(args))
-        adverse_args.adverse_correlation = True
-        adverse_vals = run_mc(args.samples, adverse_args)
-        adverse_stats = summarize(adverse_vals)
-        adverse_delta = adverse_stats['failure_prob'] - stats['failure_prob']
-    sens_results = {}
+    if args.backend == 'numba' and numba is None:
+        ap.error('--backend numba requires the numba package')
+    if args.qmc and args.backend != 'numpy':
+        ap.error('--qmc requires --backend numpy')
+    if args.shards < 1:
+        ap.error('--shards must be at least 1')
+    workers = args.workers = args.workers or os.cpu_count() or 1
+    base_params = CAPACITY_PARAMS
+    delta = 0.10
+    # Independent seed streams for the baseline, adverse and sensitivity runs
+    base_seed, adverse_seed, sens_seed = np.random.SeedSequence(args.seed).spawn(3)
+    # Every scenario is submitted up front so all shards share the pool concurrently
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        base_jobs = submit_mc(pool, args.samples, args, base_seed, args.shards)
+        adverse_jobs = None
+        if args.compare_adverse and not args.adverse_correlation:
+            adverse_args = argparse.Namespace(**vars(args))
+            adverse_args.adverse_correlation = True
+            adverse_jobs = submit_mc(pool, args.samples, adverse_args, adverse_seed, args.shards)
+        sens_jobs = None
+        if args.sensitivity:
+            # Perturbations differ only in the capacity coefficients, so one shared draw serves all
+            # of them; common random numbers also cut the variance of the median differences
+            base_coeffs = capacities(args)
+            sens_keys, sens_coeffs = ['baseline'], [base_coeffs]
+            for i, p in enumerate(base_params):
+                for sign,label in [(1,'up'),(-1,'down')]:
+                    coeffs = list(base_coeffs)
+                    coeffs[i] *= 1 + sign*delta
+                    sens_keys.append(f'{p}_{label}'); sens_coeffs.append(tuple(coeffs))
+            sens_jobs = submit_mc(pool, int(args.samples/2), args, sens_seed, args.shards, _sensitivity_chunk, sens_coeffs)  # fewer samples for speed
+        sketch = gather(base_jobs)
+        stats = summarize(sketch)
+        adverse_delta = None
+        adverse_stats = None
+        if adverse_jobs:
+            adverse_stats = summarize(gather(adverse_jobs))
+            adverse_delta = adverse_stats['failure_prob'] - stats['failure_prob']
+        sens_results = {}
+        if sens_jobs:
+            sens_results = {key: summarize(row)['P50'] for key, row in zip(sens_keys, gather(sens_jobs))}
+            sens_base_med = sens_results.pop('baseline')
+    fig1 = plot_hist(sketch, args.fig_dir)
     if args.sensitivity:
-        base_params = ['solar_capacity_kWh','biomass_capacity_kWh','actuator_load_kWh','parasitic_load_kWh']
-        delta = 0.10
-        for p in base_params:
-            original = getattr(args, p)
-            for sign,label in [(1,'up'),(-1,'down')]:
-                setattr(args, p, original * (1 + sign*delta))
-                v2 = run_mc(int(args.samples/2), args)  # fewer samples for speed
-                s2 = summarize(v2)
-                sens_results[f'{p}_{label}'] = s2['P50']
-            setattr(args, p, original)
-        # Compute approximate influence as |Δ median| / baseline median
+        # Compute approximate influence as |Δ median| / baseline median, both on the shared draw
         influences = {}
-        base_med = stats['P50']
+        base_med = sens_base_med
         for p in base_params:
             up = sens_results[f'{p}_up']
             dn = sens_results[f'{p}_down']
             influences[p] = max(abs(up-base_med), abs(dn-base_med)) / base_med if base_med!=0 else 0
         # Rank influences
         ranked = sorted(influences.items(), key=lambda x: x[1], reverse=True)
-    md = build_metadata('SIM-EN-MC', params={k: getattr(args,k) for k in ['samples','mu_S','sigma_S','mu_B','sigma_B','a_D','b_D','solar_capacity_kWh','biomass_capacity_kWh','actuator_load_kWh','parasitic_load_kWh','seed','adverse_correlation','compare_adverse'] if hasattr(args,k)}, notes='Energy balance Monte Carlo with optional adverse correlation stress test.')
+    md = build_metadata('SIM-EN-MC', params={k: getattr(args,k) for k in ['samples','mu_S','sigma_S','mu_B','sigma_B','a_D','b_D','solar_capacity_kWh','biomass_capacity_kWh','actuator_load_kWh','parasitic_load_kWh','seed','adverse_correlation','compare_adverse','backend','shards','qmc','batch_size','resolution'] if hasattr(args,k)}, notes='Energy balance Monte Carlo with optional adverse correlation stress test.')
     md['metrics'].update(stats)
     if adverse_stats:
         md['metrics']['adverse_stats'] = adverse_stats
@@ -6,13 +6,45 @@ Date: 2025
 
 import torch
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # figures and animations are written to files
 import matplotlib.pyplot as plt
 from datetime import datetime
 import os
 import json
 
+def diffusion_step(T, T_new, coef):
+    """Explicit 5-point update of T into T_new over the last two dims.
+
+    Works on a single (nx, ny) field or a (D, nx, ny) stack of independent fields. Only the
+    interior is written: the fixed-temperature edges are set once in both buffers by the
+    caller and never change, so no per-step boundary writes are needed.
+    """
+    # 5-point Laplacian on the interior, written straight into the spare buffer
+    inner = T_new[..., 1:-1, 1:-1]
+    torch.add(T[..., 2:, 1:-1], T[..., :-2, 1:-1], out=inner)
+    inner += T[..., 1:-1, 2:]
+    inner += T[..., 1:-1, :-2]
+    inner.add_(T[..., 1:-1, 1:-1], alpha=-4.)
+    inner.mul_(coef).add_(T[..., 1:-1, 1:-1])
+
+_compiled_steps = {}
+
+def get_step_fn(device, compile_step):
+    """Return diffusion_step, compiled once per device type when compile_step is set.
+
+    Shapes are fixed for a run, so the graph is specialised (dynamic=False) and reused every step.
+    """
+    if not compile_step:
+        return diffusion_step
+    mode = 'reduce-overhead' if device.type == 'cuda' else 'default'
+    if mode not in _compiled_steps:
+        _compiled_steps[mode] = torch.compile(diffusion_step, mode=mode, dynamic=False)
+    return _compiled_steps[mode]
+
 class HeatTransferSimulator:
-    def __init__(self, nx=512, ny=512, chamber_diameter_mm=4.0, output_dir="../results"):
+    def __init__(self, nx=512, ny=512, chamber_diameter_mm=4.0, output_dir="../results", dtype=torch.float32,
+                 compile_step=None):
         """
         Initialize heat transfer simulator with GPU acceleration.
         
@@ -20,6 +52,8 @@ class HeatTransferSimulator:
             nx, ny: Grid dimensions
             chamber_diameter_mm: Diameter of the combustion chamber in mm
             output_dir: Directory for saving results
+            dtype: Temperature field precision; FP32 resolves the 298-400 K range to ~3e-5 K
+            compile_step: Compile the stencil with torch.compile (default: only on CUDA)
         """
         self.nx = nx
         self.ny = ny
@@ -27,7 +61,6 @@ class HeatTransferSimulator:
         self.dy = 0.001
         self.dt = 0.01   # time step (s)
         self.alpha = 1e-5  # thermal diffusivity of water (m²/s)
-        self.chamber_diameter_mm = chamber_diameter_mm
         self.output_dir = output_dir
         
         # Check for GPU availability
@@ -37,86 +70,102 @@ class HeatTransferSimulator:
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Initialize temperature field
-        self.T = torch.full((nx, ny), 298., device=self.device)  # ambient temperature (K)
+        # Temperature field; reset() fills it with the ambient temperature
+        self.T = torch.empty((nx, ny), dtype=dtype, device=self.device)
+        
+        # Explicit-scheme coefficient and a second buffer for the in-place 5-point stencil
+        self.coef = self.alpha * self.dt / (self.dx * self.dy)
+        self.T_new = torch.empty_like(self.T)
+        if compile_step is None:
+            compile_step = self.device.type == 'cuda'
+        self._step_fn = get_step_fn(self.device, compile_step)
+        
+        # Angles of the 100 heat-flux sample points on the chamber boundary
+        theta = np.linspace(0, 2 * np.pi, 100, dtype=np.float32)
+        self._cos_theta, self._sin_theta = np.cos(theta), np.sin(theta)
         
-        # Create Laplacian kernel for convolution
-        self.kernel = torch.tensor([[0., 1., 0.],
-                                    [1., -4., 1.],
-                                    [0., 1., 0.]], 
-                                   device=self.device).unsqueeze(0).unsqueeze(0)
+        # Cell distances from the grid centre; the chamber geometry is derived from them
+        x = torch.arange(self.nx, device=self.device)
+        y = torch.arange(self.ny, device=self.device)
+        xx, yy = torch.meshgrid(x, y, indexing='ij')
+        self._distance = torch.sqrt((xx - self.nx // 2)**2 + (yy - self.ny // 2)**2)
+        # Dirichlet mask: cells the stencil updates; the edge ring stays at 298 K
+        self._interior = torch.zeros((nx, ny), dtype=torch.bool, device=self.device)
+        self._interior[1:-1, 1:-1] = True
+        
+        self.reset(chamber_diameter_mm)
+    
+    def reset(self, chamber_diameter_mm=None):
+        """Return to the ambient initial state, optionally for a new chamber diameter.
+        
+        Reuses the field buffers and grid tables, so sweeping diameters does not reallocate.
+        """
+        if chamber_diameter_mm is not None:
+            self.chamber_diameter_mm = chamber_diameter_mm
+        # Ambient temperature (K) in both buffers; this also sets the fixed edge values
+        self.T.fill_(298.)
+        self.T_new.fill_(298.)
+        self._build_chamber_geometry()
         
         # Simulation metadata
         self.metadata = {
-            'chamber_diameter_mm': chamber_diameter_mm,
-            'grid_size': f"{nx}x{ny}",
+            'chamber_diameter_mm': self.chamber_diameter_mm,
+            'grid_size': f"{self.nx}x{self.ny}",
             'dx_mm': self.dx * 1000,
             'dy_mm': self.dy * 1000,
             'dt_s': self.dt,
             'thermal_diffusivity': self.alpha,
+            'dtype': str(self.T.dtype).replace('torch.', ''),
             'timestamp': datetime.now().isoformat()
         }
     
-    def setup_hot_spot(self, temperature_K=350):
-        """Set up initial hot spot representing combustion chamber."""
-        center_x = self.nx // 2
-        center_y = self.ny // 2
-        radius_cells = int((self.chamber_diameter_mm / 2) / (self.dx * 1000))
+    def _build_chamber_geometry(self):
+        """Cache the hot-spot mask and heat-flux sample indices for the current diameter."""
+        self._radius_cells = int((self.chamber_diameter_mm / 2) / (self.dx * 1000))
         
-        # Create circular mask for hot spot
-        x = torch.arange(self.nx, device=self.device)
-        y = torch.arange(self.ny, device=self.device)
-        xx, yy = torch.meshgrid(x, y, indexing='ij')
-        
-        distance = torch.sqrt((xx - center_x)**2 + (yy - center_y)**2)
-        mask = distance <= radius_cells
+        # Circular mask for hot spot
+        self._hot_mask = (self._distance <= self._radius_cells) & self._interior
         
-        self.T[mask] = temperature_K
+        bx, by = self._boundary_samples(self._radius_cells)
+        self._bx_idx = torch.from_numpy(bx).to(self.device)
+        self._by_idx = torch.from_numpy(by).to(self.device)
+    
+    def _boundary_samples(self, radius_cells):
+        """Cell indices of the boundary sample points that have a full central-difference stencil."""
+        boundary_x = (self.nx // 2 + radius_cells * self._cos_theta).astype(np.int64)
+        boundary_y = (self.ny // 2 + radius_cells * self._sin_theta).astype(np.int64)
+        valid = (boundary_x > 1) & (boundary_x < self.nx - 1) & (boundary_y > 1) & (boundary_y < self.ny - 1)
+        return boundary_x[valid], boundary_y[valid]
+    
+    def setup_hot_spot(self, temperature_K=350):
+        """Set up initial hot spot representing combustion chamber."""
+        self.T.masked_fill_(self._hot_mask, temperature_K)
         
         self.metadata['hot_spot_temperature_K'] = temperature_K
-        self.metadata['hot_spot_radius_cells'] = radius_cells
+        self.metadata['hot_spot_radius_cells'] = self._radius_cells
     
     def step(self):
         """Perform one time step of heat diffusion."""
-        laplace = torch.nn.functional.conv2d(
-            self.T.unsqueeze(0).unsqueeze(0), 
-            self.kernel, 
-            padding=1
-        )
-        self.T = self.T + self.alpha * self.dt / (self.dx * self.dy) * laplace.squeeze()
-        
-        # Apply boundary conditions (fixed temperature at edges)
-        self.T[0, :] = 298.
-        self.T[-1, :] = 298.
-        self.T[:, 0] = 298.
-        self.T[:, -1] = 298.
+        T, T_new = self.T, self.T_new
+        self._step_fn(T, T_new, self.coef)
+        self.T, self.T_new = T_new, T
     
     def calculate_heat_flux(self):
         """Calculate heat flux at the chamber boundary."""
-        center_x = self.nx // 2
-        center_y = self.ny // 2
-        radius_cells = int((self.chamber_diameter_mm / 2) / (self.dx * 1000))
-        
-        # Sample points on the circle boundary
-        theta = torch.linspace(0, 2 * np.pi, 100, device=self.device)
-        boundary_x = center_x + radius_cells * torch.cos(theta)
-        boundary_y = center_y + radius_cells * torch.sin(theta)
-        
-        # Calculate temperature gradient at boundary
-        gradients = []
-        for i in range(len(theta)):
-            x, y = int(boundary_x[i]), int(boundary_y[i])
-            if 1 < x < self.nx - 1 and 1 < y < self.ny - 1:
-                grad_x = (self.T[x+1, y] - self.T[x-1, y]) / (2 * self.dx)
-                grad_y = (self.T[x, y+1] - self.T[x, y-1]) / (2 * self.dy)
-                gradient_magnitude = torch.sqrt(grad_x**2 + grad_y**2)
-                gradients.append(gradient_magnitude.item())
+        return self.heat_flux_tensor().item()
+    
+    def heat_flux_tensor(self):
+        """Mean boundary heat flux as a 0-d device tensor (no host sync)."""
+        x, y = self._bx_idx, self._by_idx
+        
+        # Calculate temperature gradient at all boundary points at once
+        grad_x = (self.T[x+1, y] - self.T[x-1, y]) / (2 * self.dx)
+        grad_y = (self.T[x, y+1] - self.T[x, y-1]) / (2 * self.dy)
+        gradients = torch.sqrt(grad_x**2 + grad_y**2)
         
         # Heat flux = -k * gradient (k = thermal conductivity)
         k_water = 0.6  # W/(m·K)
-        heat_flux = k_water * np.mean(gradients)
-        
-        return heat_flux
+        return k_water * gradients.mean()
     
     def run_simulation(self, n_steps=1000, save_interval=100):
         """
@@ -128,31 +177,95 @@ class HeatTransferSimulator:
         """
         print(f"Starting simulation for {self.chamber_diameter_mm}mm chamber...")
         
-        results = {
-            'time': [],
-            'max_temp': [],
-            'mean_temp': [],
-            'heat_flux': []
-        }
+        # Metrics stay on the device during the loop and are copied to the host once at the end
+        n_samples = (n_steps - 1) // save_interval + 1
+        metrics = torch.empty((3, n_samples), dtype=self.T.dtype, device=self.device)
         
         for step in range(n_steps):
             self.step()
             
             if step % save_interval == 0:
-                # Record metrics
-                max_temp = self.T.max().item()
-                mean_temp = self.T.mean().item()
-                heat_flux = self.calculate_heat_flux()
-                
-                results['time'].append(step * self.dt)
-                results['max_temp'].append(max_temp)
-                results['mean_temp'].append(mean_temp)
-                results['heat_flux'].append(heat_flux)
-                
-                print(f"Step {step}/{n_steps}: Max T={max_temp:.1f}K, "
-                      f"Mean T={mean_temp:.1f}K, Heat flux={heat_flux:.2f} W/m²")
+                k = step // save_interval
+                metrics[0, k] = self.T.max()
+                metrics[1, k] = self.T.mean()
+                metrics[2, k] = self.heat_flux_tensor()
+        
+        max_temp, mean_temp, heat_flux = metrics.tolist()
+        results = {
+            'time': [k * save_interval * self.dt for k in range(n_samples)],
+            'max_temp': max_temp,
+            'mean_temp': mean_temp,
+            'heat_flux': heat_flux
+        }
+        for k in range(n_samples):
+            print(f"Step {k * save_interval}/{n_steps}: Max T={max_temp[k]:.1f}K, "
+                  f"Mean T={mean_temp[k]:.1f}K, Heat flux={heat_flux[k]:.2f} W/m²")
         
         return results
+    
+    def batched_simulate(self, diameters_mm, n_steps=500, save_interval=50, temperature_K=350):
+        """
+        Simulate one chamber per diameter as a single (D, nx, ny) field.
+        
+        Every step advances all diameters with one stencil pass. Uses the grid, dtype and
+        device of this simulator without touching its own field.
+        
+        Returns:
+            (results, T): a run_simulation-style results dict per diameter and the final fields
+        """
+        D = len(diameters_mm)
+        print(f"Starting batched simulation for {', '.join(f'{d}mm' for d in diameters_mm)} chambers...")
+        radii = [int((d / 2) / (self.dx * 1000)) for d in diameters_mm]
+        T = torch.full((D, self.nx, self.ny), 298., dtype=self.T.dtype, device=self.device)
+        T.masked_fill_((self._distance <= torch.tensor(radii, device=self.device).view(D, 1, 1)) & self._interior, temperature_K)
+        T_new = torch.full_like(T, 298.)
+        
+        # Flux sample points of every member as flat (member, x, y) index tensors
+        samples = [self._boundary_samples(r) for r in radii]
+        m = torch.tensor(np.repeat(np.arange(D), [len(bx) for bx, _ in samples]), device=self.device)
+        x = torch.from_numpy(np.concatenate([bx for bx, _ in samples])).to(self.device)
+        y = torch.from_numpy(np.concatenate([by for _, by in samples])).to(self.device)
+        counts = torch.bincount(m, minlength=D).to(T.dtype)
+        k_water = 0.6  # W/(m·K)
+        
+        n_samples = (n_steps - 1) // save_interval + 1
+        metrics = torch.empty((3, D, n_samples), dtype=T.dtype, device=self.device)
+        for step in range(n_steps):
+            self._step_fn(T, T_new, self.coef)
+            T, T_new = T_new, T
+            
+            if step % save_interval == 0:
+                k = step // save_interval
+                metrics[0, :, k] = T.amax((-2, -1))
+                metrics[1, :, k] = T.mean((-2, -1))
+                grad_x = (T[m, x+1, y] - T[m, x-1, y]) / (2 * self.dx)
+                grad_y = (T[m, x, y+1] - T[m, x, y-1]) / (2 * self.dy)
+                gradients = torch.sqrt(grad_x**2 + grad_y**2)
+                metrics[2, :, k] = k_water * torch.zeros(D, dtype=T.dtype, device=self.device).index_add_(0, m, gradients) / counts
+        
+        times = [k * save_interval * self.dt for k in range(n_samples)]
+        results = [{'time': times, 'max_temp': max_temp, 'mean_temp': mean_temp, 'heat_flux': heat_flux}
+                   for max_temp, mean_temp, heat_flux in zip(*metrics.tolist())]
+        for d, r in zip(diameters_mm, results):
+            print(f"{d}mm: Max T={r['max_temp'][-1]:.1f}K, Mean T={r['mean_temp'][-1]:.1f}K, "
+                  f"Heat flux={r['heat_flux'][-1]:.2f} W/m² after {n_steps} steps")
+        return results, T
+
+    def _collect_frames(self, n_steps, capture_every, downsample):
+        """Advance n_steps, capturing the downsampled field, Tmax and boundary heat flux every
+        capture_every steps. Snapshots are stacked on the device and copied to the host at once.
+
+        Returns:
+            (fields, tmax, flux) NumPy arrays with one entry per frame
+        """
+        fields, tmax, flux = [], [], []
+        for _ in range(n_steps // capture_every):
+            for _ in range(capture_every):
+                self.step()
+            fields.append(self.T[::downsample, ::downsample].clone())
+            tmax.append(self.T.max())
+            flux.append(self.heat_flux_tensor())
+        return tuple(torch.stack(v).cpu().numpy() for v in (fields, tmax, flux))
 
     def generate_animation(self, n_steps=400, capture_every=2, downsample=4, outfile="heat_diffusion_animation.mp4"):
         """Generate a dynamic animation (MP4/GIF) of the diffusion process.
@@ -163,7 +276,6 @@ class HeatTransferSimulator:
             downsample: spatial downsample factor for speed (>=1).
             outfile: output filename (placed in output_dir).
         """
-        import matplotlib.pyplot as plt
         from matplotlib import animation
 
         # Prepare figure
@@ -174,29 +286,23 @@ class HeatTransferSimulator:
         # Initial frame image
         frame_data = self.T[::downsample, ::downsample].detach().cpu().numpy()
         im = ax.imshow(frame_data, cmap='inferno', vmin=298, vmax=max(350, frame_data.max()))
-        cbar = plt.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+        cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
         cbar.set_label('Temperature (K)')
 
-        times = []
-        max_t = []
+        # Run the simulation first; the callback below only draws precomputed frames
+        fields, tmax, _ = self._collect_frames(n_steps, capture_every, downsample)
 
         def update(frame_idx):
-            # Advance simulation capture_every steps
-            for _ in range(capture_every):
-                self.step()
             if frame_idx % 10 == 0:
                 # Update color scale upper bound softly (avoid jumpy scaling)
-                current_max = float(self.T.max().item())
+                current_max = float(tmax[frame_idx])
                 if current_max > im.norm.vmax - 1:
                     im.set_clim(vmin=298, vmax=current_max)
-            data = self.T[::downsample, ::downsample].detach().cpu().numpy()
-            im.set_data(data)
-            times.append(frame_idx * capture_every * self.dt)
-            max_t.append(float(self.T.max().item()))
-            ax.set_title(f"Heat Diffusion t={times[-1]:.2f}s  Tmax={max_t[-1]:.1f}K")
+            im.set_data(fields[frame_idx])
+            ax.set_title(f"Heat Diffusion t={frame_idx * capture_every * self.dt:.2f}s  Tmax={tmax[frame_idx]:.1f}K")
             return [im]
 
-        frames = n_steps // capture_every
+        frames = len(fields)
         print(f"Generating animation: {frames} frames (every {capture_every} steps up to {n_steps})")
         anim = animation.FuncAnimation(fig, update, frames=frames, interval=40, blit=True)
 
@@ -237,27 +343,21 @@ class HeatTransferSimulator:
             comparison_steps: steps for baseline quick simulations
             outfile: output file name in output_dir
         """
-        import matplotlib.pyplot as plt
         from matplotlib import animation
 
         total_frames = int(duration_s * fps)
         n_steps = total_frames * capture_every
         print(f"Composite animation: {total_frames} frames | {n_steps} sim steps (capture_every={capture_every})")
 
-        # Precompute baseline flux means
-        baseline_flux = {}
-        for d in comparison_diameters:
-            if abs(d - self.chamber_diameter_mm) < 1e-6:
-                continue
-            temp_sim = HeatTransferSimulator(nx=min(self.nx,256), ny=min(self.ny,256), chamber_diameter_mm=d, output_dir=self.output_dir)
-            temp_sim.setup_hot_spot(temperature_K=self.metadata.get('hot_spot_temperature_K',350))
-            # run coarse steps capturing flux every 25 steps
-            collect = []
-            for s in range(comparison_steps):
-                temp_sim.step()
-                if s % 25 == 0:
-                    collect.append(temp_sim.calculate_heat_flux())
-            baseline_flux[d] = float(np.mean(collect)) if collect else 0.0
+        # Precompute baseline flux means: all other diameters in one batched coarse run,
+        # sampling flux every 25 steps
+        others = [d for d in comparison_diameters if abs(d - self.chamber_diameter_mm) >= 1e-6]
+        baseline_flux = {d: 0.0 for d in others}
+        if others and comparison_steps > 0:
+            temp_sim = HeatTransferSimulator(nx=min(self.nx,256), ny=min(self.ny,256), chamber_diameter_mm=others[0], output_dir=self.output_dir)
+            runs, _ = temp_sim.batched_simulate(others, n_steps=comparison_steps, save_interval=25,
+                                                temperature_K=self.metadata.get('hot_spot_temperature_K',350))
+            baseline_flux = {d: float(np.mean(r['heat_flux'])) for d, r in zip(others, runs)}
 
         # Setup figure layout
         fig = plt.figure(figsize=(9,5))
@@ -271,11 +371,14 @@ class HeatTransferSimulator:
         im = ax_field.imshow(img_data, cmap='inferno', vmin=298, vmax=max(350, img_data.max()))
         ax_field.set_title(f"Heat Field Ø{self.chamber_diameter_mm}mm")
         ax_field.set_axis_off()
-        cbar = plt.colorbar(im, ax=ax_field, fraction=0.046, pad=0.02)
+        cbar = fig.colorbar(im, ax=ax_field, fraction=0.046, pad=0.02)
         cbar.set_label('T (K)')
 
+        # Run the simulation first; the callback below only draws precomputed frames
+        fields, tmax_trace, flux_trace = self._collect_frames(n_steps, capture_every, downsample)
+        times = np.arange(len(fields)) * capture_every * self.dt
+
         # Flux / Tmax traces
-        times, flux_trace, tmax_trace = [], [], []
         flux_line, = ax_flux.plot([], [], 'b-', label='Heat Flux (W/m²)', linewidth=1.8)
         tmax_line, = ax_flux.plot([], [], 'r--', label='Tmax (K)', linewidth=1.2)
         ax_flux.set_xlim(0, duration_s)
@@ -297,31 +400,23 @@ class HeatTransferSimulator:
         live_index = len(bar_labels)-1
 
         def update(frame):
-            # advance simulation
-            for _ in range(capture_every):
-                self.step()
             # Field update
-            data = self.T[::downsample, ::downsample].detach().cpu().numpy()
-            current_max = float(self.T.max().item())
+            current_max = float(tmax_trace[frame])
             if current_max > im.norm.vmax - 0.5:
                 im.set_clim(vmin=298, vmax=current_max)
-            im.set_data(data)
+            im.set_data(fields[frame])
             # Metrics
-            t = frame * capture_every * self.dt
-            flux = self.calculate_heat_flux()
-            times.append(t)
-            flux_trace.append(flux)
-            tmax_trace.append(current_max)
+            flux = float(flux_trace[frame])
             # Scale traces to share axis: dynamic normalization
-            if len(flux_trace) > 5:
-                fmax = max(flux_trace)
-                tmax = max(tmax_trace)
+            if frame + 1 > 5:
+                fmax = flux_trace[:frame+1].max()
+                tmax = tmax_trace[:frame+1].max()
                 ax_flux.set_ylim(0, 1.05)
-                flux_norm = [f/fmax if fmax>0 else 0 for f in flux_trace]
-                tmax_norm = [tm/tmax if tmax>0 else 0 for tm in tmax_trace]
-                flux_line.set_data(times, flux_norm)
-                tmax_line.set_data(times, tmax_norm)
-                ax_flux.set_xlim(0, max(times) if max(times)>0 else duration_s)
+                flux_norm = flux_trace[:frame+1] / fmax if fmax > 0 else np.zeros(frame+1)
+                tmax_norm = tmax_trace[:frame+1] / tmax if tmax > 0 else np.zeros(frame+1)
+                flux_line.set_data(times[:frame+1], flux_norm)
+                tmax_line.set_data(times[:frame+1], tmax_norm)
+                ax_flux.set_xlim(0, times[frame] if times[frame] > 0 else duration_s)
             # Update live bar
             heights = [baseline_flux[d] for d in sorted(baseline_flux.keys())] + [flux]
             for rect, h in zip(bar_container, heights):
@@ -359,7 +454,7 @@ class HeatTransferSimulator:
         axes[0].set_title(f'Temperature Distribution\n{self.chamber_diameter_mm}mm Chamber')
         axes[0].set_xlabel('X (mm)')
         axes[0].set_ylabel('Y (mm)')
-        plt.colorbar(im1, ax=axes[0], label='Temperature (K)')
+        fig.colorbar(im1, ax=axes[0], label='Temperature (K)')
         
         # Convert axis labels to mm
         x_ticks = np.linspace(0, self.nx, 5)
@@ -376,11 +471,11 @@ class HeatTransferSimulator:
         axes[1].set_title('Heat Flux at Chamber Boundary')
         axes[1].grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         fig_path = os.path.join(self.output_dir, f"{base_name}.png")
-        plt.savefig(fig_path, dpi=150, bbox_inches='tight')
+        fig.savefig(fig_path, dpi=150, bbox_inches='tight')
         print(f"Saved figure: {fig_path}")
-        plt.close()
+        plt.close(fig)
         
         # Save numerical results as JSON
         results['metadata'] = self.metadata
@@ -415,13 +510,14 @@ class HeatTransferSimulator:
         """
         comparison_results = {}
         
-        for diameter in diameters_mm:
-            # Reset simulator with new diameter
-            self.__init__(self.nx, self.ny, diameter, self.output_dir)
+        # All diameters advance together in one batched field
+        batch_results, fields = self.batched_simulate(diameters_mm, n_steps, save_interval=50, temperature_K=350)
+        
+        for diameter, results, field in zip(diameters_mm, batch_results, fields):
+            # Point the simulator at this diameter's final state for save_results
+            self.reset(diameter)
             self.setup_hot_spot(temperature_K=350)
-            
-            # Run simulation
-            results = self.run_simulation(n_steps, save_interval=50)
+            self.T.copy_(field)
             self.save_results(results)
             
             # Store key metrics
@@ -468,12 +564,12 @@ class HeatTransferSimulator:
                            fontsize=9,
                            color='blue')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Save comparison plot
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         comparison_path = os.path.join(self.output_dir, f"chamber_comparison_{timestamp}.png")
-        plt.savefig(comparison_path, dpi=150, bbox_inches='tight')
+        fig.savefig(comparison_path, dpi=150, bbox_inches='tight')
         print(f"Saved comparison plot: {comparison_path}")
         
         # Save to LaTeX directory
@@ -485,7 +581,7 @@ class HeatTransferSimulator:
         except:
             pass
         
-        plt.show()
+        plt.close(fig)
 
 
 def main():
@@ -3,11 +3,20 @@
 Creates hexagonal honeycomb lattice structures for 3D printing and CFD analysis
 """
 
+import argparse
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
+from matplotlib.collections import EllipseCollection
 import trimesh
 
+_SQRT3 = 1.7320508075688772
+_SQRT3_HALF = _SQRT3 * 0.5
+_MM_TO_M = 1e-3
+
 def create_hexagonal_lattice(width, height, depth, channel_diameter, wall_thickness):
     """
     Generate hexagonal honeycomb lattice structure
@@ -18,33 +27,37 @@ def create_hexagonal_lattice(width, height, depth, channel_diameter, wall_thickn
     - wall_thickness: thickness of lattice walls (mm)
     """
     # Convert to meters for calculations
-    w, h, d = width/1000, height/1000, depth/1000
-    r = channel_diameter/2000  # radius in meters
-    t = wall_thickness/1000
+    w, h, d = width * _MM_TO_M, height * _MM_TO_M, depth * _MM_TO_M
+    r = channel_diameter * 0.5 * _MM_TO_M  # radius in meters
+    t = wall_thickness * _MM_TO_M
     
     # Hexagonal spacing
     spacing = channel_diameter + wall_thickness  # center-to-center distance
-    spacing_m = spacing/1000
+    spacing_m = spacing * _MM_TO_M
+    dx = spacing_m * _SQRT3_HALF  # column pitch
     
     # Calculate number of hexagons that fit
-    nx = int(w / (spacing_m * np.sqrt(3)/2))
+    nx = int(w / dx)
     ny = int(h / (spacing_m * 1.5))
     
     print(f"Creating {nx}×{ny} hexagonal lattice")
     print(f"Total channels: {nx * ny}")
     print(f"Channel spacing: {spacing:.2f} mm")
     
-    # Generate hexagon centers
-    centers = []
-    for i in range(nx):
-        for j in range(ny):
-            x = i * spacing_m * np.sqrt(3)/2
-            y = j * spacing_m * 1.5
-            if j % 2 == 1:  # Offset every other row
-                x += spacing_m * np.sqrt(3)/4
-            centers.append([x, y])
-    
-    return np.array(centers), nx, ny, spacing_m
+    # Generate hexagon centers on an (i, j) index grid, j varying fastest
+    I, J = np.meshgrid(np.arange(nx), np.arange(ny), indexing='ij')
+    X = I * dx + (J & 1) * (dx * 0.5)  # Offset every other row
+    Y = J * (spacing_m * 1.5)
+    
+    return np.column_stack([X.ravel(), Y.ravel()]), nx, ny, spacing_m
+
+@functools.lru_cache(maxsize=None)
+def _unit_cylinder():
+    """Vertices and faces of a radius-1, height-1 cylinder, triangulated once and scaled per mesh."""
+    proto = trimesh.creation.cylinder(radius=1.0, height=1.0)
+    vertices, faces = np.array(proto.vertices), np.array(proto.faces)
+    vertices.flags.writeable = faces.flags.writeable = False
+    return vertices, faces
 
 def generate_stl_mesh(centers, channel_radius, depth, filename):
     """
@@ -52,18 +65,13 @@ def generate_stl_mesh(centers, channel_radius, depth, filename):
     """
     print(f"Generating STL mesh: {filename}")
     
-    # Create cylinder for each channel
-    cylinders = []
-    for center in centers:
-        cylinder = trimesh.creation.cylinder(
-            radius=channel_radius,
-            height=depth/1000,
-            transform=trimesh.transformations.translation_matrix([center[0], center[1], 0])
-        )
-        cylinders.append(cylinder)
-    
-    # Combine all cylinders
-    combined = trimesh.util.concatenate(cylinders)
+    # Tile one cylinder's vertices and faces to every channel center as a single mesh
+    unit_vertices, unit_faces = _unit_cylinder()
+    proto = unit_vertices * np.array([channel_radius, channel_radius, depth * _MM_TO_M])
+    offsets = np.column_stack([centers, np.zeros(len(centers))])
+    vertices = (proto[None, :, :] + offsets[:, None, :]).reshape(-1, 3)
+    faces = (unit_faces[None, :, :] + (np.arange(len(centers)) * len(proto))[:, None, None]).reshape(-1, 3)
+    combined = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
     
     # Create bounding box
     bounds = combined.bounds
@@ -87,15 +95,15 @@ def calculate_lattice_properties(centers, channel_diameter, depth, wall_thicknes
     Calculate flow and structural properties of the lattice
     """
     n_channels = len(centers)
-    channel_radius = channel_diameter/2000  # m
+    channel_radius = channel_diameter * 0.5 * _MM_TO_M  # m
     
     # Flow properties
     channel_area = np.pi * channel_radius**2  # m²
     total_flow_area = n_channels * channel_area
     
     # Structural properties  
-    spacing = (channel_diameter + wall_thickness)/1000  # m
-    lattice_area = len(centers) * spacing**2 * np.sqrt(3)/2  # hexagonal packing
+    spacing = (channel_diameter + wall_thickness) * _MM_TO_M  # m
+    lattice_area = len(centers) * spacing**2 * _SQRT3_HALF  # hexagonal packing
     
     porosity = total_flow_area / lattice_area
     
@@ -115,33 +123,77 @@ def calculate_lattice_properties(centers, channel_diameter, depth, wall_thicknes
     
     return properties
 
-def plot_lattice_2d(centers, channel_radius, title="Hexagonal Lattice"):
+def show_or_save(fig, fig_path=None):
+    """Write `fig` to fig_path, or show it when no path is given; either way it is closed after."""
+    if fig_path:
+        fig.savefig(fig_path, dpi=150)
+    else:
+        plt.show()
+    plt.close(fig)
+
+def plot_lattice_2d(centers, channel_radius, title="Hexagonal Lattice", fig_path=None):
     """
     Create 2D visualization of lattice structure
     """
     fig, ax = plt.subplots(figsize=(10, 8))
     
-    # Plot channels as circles
-    for center in centers:
-        circle = plt.Circle((center[0]*1000, center[1]*1000), 
-                          channel_radius*1000, 
-                          fill=False, color='blue', linewidth=1)
-        ax.add_patch(circle)
+    # Plot channels as circles, all in one collection
+    xy_mm = centers * 1000
+    diameters = np.full(len(centers), channel_radius * 2000)
+    ax.add_collection(EllipseCollection(diameters, diameters, np.zeros(len(centers)), units='xy',
+                                        offsets=xy_mm, offset_transform=ax.transData,
+                                        facecolors='none', edgecolors='blue', linewidths=1))
     
-    ax.set_xlim(-5, max(centers[:,0])*1000 + 5)
-    ax.set_ylim(-5, max(centers[:,1])*1000 + 5)
+    x_max, y_max = xy_mm.max(axis=0)
+    ax.set_xlim(-5, x_max + 5)
+    ax.set_ylim(-5, y_max + 5)
     ax.set_aspect('equal')
     ax.set_xlabel('X (mm)')
     ax.set_ylabel('Y (mm)')
     ax.set_title(title)
     ax.grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    show_or_save(fig, fig_path)
 
-def create_lattice_variants():
+def process_config(config):
+    """
+    Generate one configuration's lattice, properties and STL (runs in a worker process)
+    """
+    # Generate lattice
+    centers, nx, ny, spacing = create_hexagonal_lattice(
+        config["width"], config["height"], config["depth"],
+        config["channel_diameter"], config["wall_thickness"]
+    )
+    
+    # Calculate properties
+    props = calculate_lattice_properties(
+        centers, config["channel_diameter"], 
+        config["depth"], config["wall_thickness"]
+    )
+    
+    # Add configuration info
+    props.update(config)
+    
+    # Generate STL (optional - comment out if trimesh not available)
+    try:
+        stl_filename = f"lattice_{config['name']}.stl"
+        lattice_mesh = generate_stl_mesh(
+            centers, config["channel_diameter"]/2000, 
+            config["depth"], stl_filename
+        )
+    except Exception as e:
+        print(f"STL generation failed: {e}")
+    
+    return props, centers
+
+def create_lattice_variants(fig_dir=None, plot=True, workers=0):
     """
     Create different lattice configurations for comparison
+
+    Configurations are processed in parallel worker processes (workers=0: one per core, capped
+    at the number of configurations); figures are drawn afterwards in this process. They are
+    written to fig_dir when given, shown otherwise, and skipped when plot is False.
     """
     configurations = [
         {"name": "Fine_2mm", "width": 50, "height": 50, "depth": 10, 
@@ -152,41 +204,25 @@ def create_lattice_variants():
          "channel_diameter": 6.0, "wall_thickness": 1.5},
     ]
     
+    workers = min(len(configurations), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(process_config, configurations))
+    else:
+        outputs = list(map(process_config, configurations))
+    
     results = []
     
-    for config in configurations:
-        print(f"\nProcessing {config['name']} configuration...")
+    for config, (props, centers) in zip(configurations, outputs):
+        print(f"\n{config['name']} configuration")
         print("=" * 50)
-        
-        # Generate lattice
-        centers, nx, ny, spacing = create_hexagonal_lattice(
-            config["width"], config["height"], config["depth"],
-            config["channel_diameter"], config["wall_thickness"]
-        )
-        
-        # Calculate properties
-        props = calculate_lattice_properties(
-            centers, config["channel_diameter"], 
-            config["depth"], config["wall_thickness"]
-        )
-        
-        # Add configuration info
-        props.update(config)
         results.append(props)
         
         # Create visualization
-        plot_lattice_2d(centers, config["channel_diameter"]/2000, 
-                       f"{config['name']} Lattice")
-        
-        # Generate STL (optional - comment out if trimesh not available)
-        try:
-            stl_filename = f"lattice_{config['name']}.stl"
-            lattice_mesh = generate_stl_mesh(
-                centers, config["channel_diameter"]/2000, 
-                config["depth"], stl_filename
-            )
-        except Exception as e:
-            print(f"STL generation failed: {e}")
+        if plot:
+            plot_lattice_2d(centers, config["channel_diameter"]/2000, 
+                           f"{config['name']} Lattice",
+                           fig_path=fig_dir and os.path.join(fig_dir, f"lattice_{config['name']}_2d.png"))
         
         # Print properties
         print(f"Channels: {props['n_channels']}")
@@ -197,7 +233,7 @@ def create_lattice_variants():
     
     return results
 
-def compare_lattice_performance(results):
+def compare_lattice_performance(results, fig_dir=None, plot=True):
     """
     Compare performance metrics across different lattice configurations
     """
@@ -212,6 +248,9 @@ def compare_lattice_performance(results):
                       'total_flow_area_mm2', 'surface_area_per_volume']
     print(df[comparison_cols].round(3))
     
+    if not plot:
+        return df
+    
     # Performance plots
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
     
@@ -233,7 +272,7 @@ def compare_lattice_performance(results):
     ax3.set_xlabel('Total Flow Area (mm²)')
     ax3.set_ylabel('Total Surface Area (mm²)')
     ax3.set_title('Flow Area vs Surface Area')
-    cbar = plt.colorbar(ax3.collections[0], ax=ax3)
+    cbar = fig.colorbar(ax3.collections[0], ax=ax3)
     cbar.set_label('Channel Diameter (mm)')
     
     # Surface area per volume
@@ -242,21 +281,31 @@ def compare_lattice_performance(results):
     ax4.set_title('Heat Transfer Surface Density')
     ax4.tick_params(axis='x', rotation=45)
     
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    show_or_save(fig, fig_dir and os.path.join(fig_dir, 'lattice_comparison.png'))
     
     return df
 
-if __name__ == "__main__":
+def main():
+    """Generate lattice variants and compare performance"""
+    ap = argparse.ArgumentParser(description='Generate hexagonal lattice variants and compare them')
+    ap.add_argument('--fig_dir', type=str, default=None, help='Write figures here instead of showing them')
+    ap.add_argument('--no_plot', action='store_true', help='Skip all figures')
+    ap.add_argument('--workers', type=int, default=0, help='Worker processes for the configurations (0 = all cores)')
+    args = ap.parse_args()
+    if args.fig_dir:
+        os.makedirs(args.fig_dir, exist_ok=True)
+        plt.switch_backend('Agg')
+    
     print("3D Lattice Structure Generator")
     print("=" * 50)
     print("Generating lattice variants for bio-hybrid systems...")
     
     # Create different lattice configurations
-    results = create_lattice_variants()
+    results = create_lattice_variants(args.fig_dir, plot=not args.no_plot, workers=args.workers)
     
     # Compare performance
-    comparison_df = compare_lattice_performance(results)
+    comparison_df = compare_lattice_performance(results, args.fig_dir, plot=not args.no_plot)
     
     # Save results
     comparison_df.to_csv('lattice_comparison.csv', index=False)
@@ -267,3 +316,6 @@ if __name__ == "__main__":
     print("2. Use STL files for CFD analysis in OpenFOAM")
     print("3. Run pressure drop analysis on generated geometries")
     print("4. Test heat transfer performance experimentally")
+
+if __name__ == "__main__":
+    main()
@@ -10,51 +10,96 @@ Enhancements in this revision:
  - Added Monte Carlo hypervolume estimate ("hv_estimate") for the non-dominated front relative to a reference point
      automatically chosen as 1.05 * max(objective) along each axis (slightly outside worst point) unless overridden.
  - CLI parameters: --hv_samples, --ref_pressure, --ref_inv_surface, --ref_neg_stiffness for reproducible HV calculations.
+ - The population is held as a structure of arrays (`Population`) and evaluated with array expressions.
 """
 from __future__ import annotations
-import argparse, os, random, math
+import argparse, os, math, bisect
+from dataclasses import dataclass, fields
+import numpy as np
 import matplotlib.pyplot as plt
 from sim_utils import build_metadata, save_results, register_figure
-from typing import List, Dict, Any
 
-def random_ind(rng):
-    cell_d = rng.uniform(1.5e-3, 6e-3)
-    strut_t = rng.uniform(0.3e-3, 1.2e-3)
-    porosity = rng.uniform(0.3, 0.7)
-    return {'cell_d': cell_d, 'strut_t': strut_t, 'porosity': porosity}
+try:
+    import numba
+except ImportError:
+    numba = None
 
-def evaluate(ind):
-    cell_d = ind['cell_d']; strut_t = ind['strut_t']; porosity = ind['porosity']
-    pressure_proxy = 1 / (cell_d**4)
-    surface_density = 1 / (cell_d * strut_t)
-    stiffness_index = (1-porosity)**2 * (strut_t / cell_d)
-    ind['pressure_proxy'] = pressure_proxy
-    ind['inv_surface_density'] = 1/surface_density
-    ind['neg_stiffness_index'] = -stiffness_index
-    return ind
+PARAM_BOUNDS = {'cell_d': (1.5e-3, 6e-3), 'strut_t': (0.3e-3, 1.2e-3), 'porosity': (0.3, 0.7)}
+PARAM_LO, PARAM_HI = np.array(list(PARAM_BOUNDS.values())).T
+OBJECTIVES = ('pressure_proxy', 'inv_surface_density', 'neg_stiffness_index')
+HV_CHUNK = 4096  # Monte Carlo hypervolume samples tested per batch
 
-def pareto_filter(designs):
-    front = []
-    for d in designs:
-        dominated = False
-        for e in designs:
-            if e is d: continue
-            # e dominates d if all objectives <= and one strictly <
-            if (e['pressure_proxy'] <= d['pressure_proxy'] and
-                e['inv_surface_density'] <= d['inv_surface_density'] and
-                e['neg_stiffness_index'] <= d['neg_stiffness_index'] and
-                (e['pressure_proxy'] < d['pressure_proxy'] or e['inv_surface_density'] < d['inv_surface_density'] or e['neg_stiffness_index'] < d['neg_stiffness_index'])):
-                dominated = True
-                break
-        if not dominated:
-            front.append(d)
-    return front
+@dataclass
+class Population:
+    """GA population as a structure of arrays: every field is an (N,) array (None until computed)."""
+    cell_d: np.ndarray
+    strut_t: np.ndarray
+    porosity: np.ndarray
+    pressure_proxy: np.ndarray = None
+    inv_surface_density: np.ndarray = None
+    neg_stiffness_index: np.ndarray = None
+    rank: np.ndarray = None
+    crowd: np.ndarray = None
+
+    def __len__(self):
+        return len(self.cell_d)
+
+    def params(self):
+        """(N,3) array of the design parameters, in PARAM_BOUNDS order."""
+        return np.column_stack([getattr(self, k) for k in PARAM_BOUNDS])
+
+    def objectives(self):
+        """(N,3) array of the minimized objectives, in OBJECTIVES order."""
+        return np.column_stack([getattr(self, k) for k in OBJECTIVES]).reshape(-1, 3)
+
+    def take(self, idx):
+        """Sub-population at an integer or boolean index array."""
+        return Population(**{f.name: None if getattr(self, f.name) is None else getattr(self, f.name)[idx]
+                             for f in fields(self)})
+
+    @staticmethod
+    def concat(a, b):
+        """Parameters and objectives of `a` followed by `b` (rank and crowding are not carried)."""
+        return Population(*(np.concatenate([getattr(a, k), getattr(b, k)]) for k in (*PARAM_BOUNDS, *OBJECTIVES)))
+
+def random_pop(n, rng):
+    return Population(*(rng.uniform(lo, hi, size=n) for lo, hi in PARAM_BOUNDS.values()))
+
+def evaluate_pop(pop):
+    pop.pressure_proxy = 1.0 / pop.cell_d**4
+    pop.inv_surface_density = pop.cell_d * pop.strut_t
+    pop.neg_stiffness_index = -((1 - pop.porosity)**2 * (pop.strut_t / pop.cell_d))
+    return pop
+
+def pareto_filter(pop):
+    """Non-dominated sub-population of `pop`, in input order.
+
+    Kung's sweep: after a lexicographic sort anything dominating a design comes before it, so each
+    design is only checked against a 2D staircase of the (obj2, obj3) pairs kept so far.
+    """
+    obj = pop.objectives()
+    rows = obj.tolist()
+    keep = np.zeros(len(rows), dtype=bool)
+    ys, zs, xs = [], [], []  # staircase: ys ascending, zs strictly descending, xs = obj1 of the entry
+    for i in np.lexsort(obj.T[::-1]).tolist():
+        x, y, z = rows[i]
+        j = bisect.bisect_right(ys, y) - 1
+        if j >= 0 and zs[j] <= z:
+            # Only an exact duplicate of a kept design survives
+            keep[i] = (xs[j], ys[j], zs[j]) == (x, y, z)
+            continue
+        keep[i] = True
+        lo = hi = bisect.bisect_left(ys, y)
+        while hi < len(ys) and zs[hi] >= z:
+            hi += 1
+        ys[lo:hi], zs[lo:hi], xs[lo:hi] = [y], [z], [x]
+    return pop.take(keep)
 
-def plot_front(front: List[Dict[str,Any]], fig_dir: str):
+def plot_front(front: Population, fig_dir: str):
     os.makedirs(fig_dir, exist_ok=True)
-    pp = [d['pressure_proxy'] for d in front]
-    isd = [d['inv_surface_density'] for d in front]
-    sti = [-d['neg_stiffness_index'] for d in front]
+    pp = front.pressure_proxy
+    isd = front.inv_surface_density
+    sti = -front.neg_stiffness_index
     plt.figure(figsize=(6,4))
     sc = plt.scatter(pp, isd, c=sti, cmap='plasma', edgecolor='k')
     plt.xlabel('Pressure Drop Proxy')
@@ -66,19 +111,17 @@ def plot_front(front: List[Dict[str,Any]], fig_dir: str):
     plt.tight_layout(); plt.savefig(fig1, dpi=140); plt.close()
     return fig1
 
-def estimate_hypervolume(front: List[Dict[str,Any]], ref_point: tuple, samples: int, rng: random.Random) -> float:
+def estimate_hypervolume(front: Population, ref_point: tuple, samples: int, rng: np.random.Generator) -> float:
     """Monte Carlo estimate of 3D hypervolume (objectives minimized) dominated by the front.
 
     We uniformly sample the axis-aligned box between the ideal point (component-wise min across front)
     and the reference point (ref_point). The fraction of samples dominated by at least one Pareto point
     times the box volume gives an HV estimate. This is coarse but stable enough for tracking relative improvement.
     """
-    if not front:
+    if not len(front):
         return 0.0
     # Construct ideal point and ensure reference point is worse in all objectives
-    p_min = min(d['pressure_proxy'] for d in front)
-    s_min = min(d['inv_surface_density'] for d in front)
-    n_min = min(d['neg_stiffness_index'] for d in front)
+    p_min, s_min, n_min = front.objectives().min(axis=0).tolist()
     p_ref, s_ref, n_ref = ref_point
     # Guard: if ref_point is not strictly worse, expand it slightly
     eps = 1e-9
@@ -88,103 +131,111 @@ def estimate_hypervolume(front: List[Dict[str,Any]], ref_point: tuple, samples:
     vol_box = (p_ref - p_min) * (s_ref - s_min) * (n_ref - n_min)
     if vol_box <= 0:
         return 0.0
+    objs = front.objectives()
+    lo = np.array([p_min, s_min, n_min]); span = np.array([p_ref, s_ref, n_ref]) - lo
     dominated = 0
-    for _ in range(samples):
-        rp = p_min + rng.random() * (p_ref - p_min)
-        rs = s_min + rng.random() * (s_ref - s_min)
-        rn = n_min + rng.random() * (n_ref - n_min)
+    # Samples are drawn and tested in chunks to bound the (chunk, F, 3) comparison
+    for start in range(0, samples, HV_CHUNK):
+        pts = lo + rng.random((min(HV_CHUNK, samples - start), 3)) * span
         # A sample point is dominated if some front point has all objectives <=
-        for d in front:
-            if (d['pressure_proxy'] <= rp and d['inv_surface_density'] <= rs and d['neg_stiffness_index'] <= rn):
-                dominated += 1
-                break
+        dominated += int(np.count_nonzero((objs[None, :, :] <= pts[:, None, :]).all(axis=2).any(axis=1)))
     return dominated / samples * vol_box
 
-def sbx_crossover(a, b, rng, eta=15):
-    child = {}
-    for k in ['cell_d','strut_t','porosity']:
-        x1, x2 = a[k], b[k]
-        if rng.random() < 0.5:
-            if abs(x1 - x2) < 1e-12:
-                child[k] = x1
-            else:
-                x_low, x_high = min(x1,x2), max(x1,x2)
-                u = rng.random()
-                beta = (2*u)**(1/(eta+1)) if u <= 0.5 else (1/(2*(1-u)))**(1/(eta+1))
-                child_val = 0.5*((x1+x2) - beta*(x2 - x1)) if rng.random()<0.5 else 0.5*((x1+x2) + beta*(x2 - x1))
-                child[k] = child_val
-        else:
-            child[k] = x1
-    # parameter bounds
-    child['cell_d'] = min(max(child['cell_d'],1.5e-3),6e-3)
-    child['strut_t'] = min(max(child['strut_t'],0.3e-3),1.2e-3)
-    child['porosity'] = min(max(child['porosity'],0.3),0.7)
-    return child
+def sbx_crossover(x1, x2, rng, eta=15):
+    """SBX children of parent rows `x1` and `x2` ((M,3) arrays in PARAM_BOUNDS order), clipped to the bounds.
+
+    Each parameter is crossed over with probability 0.5 and otherwise inherited from `x1`.
+    """
+    cross = (rng.random(x1.shape) < 0.5) & (np.abs(x1 - x2) >= 1e-12)
+    u = rng.random(x1.shape)
+    beta = np.where(u <= 0.5, (2*u)**(1/(eta+1)), (1/(2*(1-u)))**(1/(eta+1)))
+    spread = beta*(x2 - x1)
+    child = np.where(rng.random(x1.shape) < 0.5, 0.5*((x1+x2) - spread), 0.5*((x1+x2) + spread))
+    return np.clip(np.where(cross, child, x1), PARAM_LO, PARAM_HI)
+
+def mutate(children, rng, p=0.2):
+    """Redraw each parameter uniformly within its bounds with probability p."""
+    redraw = rng.random(children.shape) < p
+    return np.where(redraw, rng.uniform(PARAM_LO, PARAM_HI, children.shape), children)
+
+def _rank_fronts(objs):
+    """Non-domination rank of each row of the (N,3) objective array; compiled by Numba."""
+    N = objs.shape[0]
+    dom = np.zeros((N, N), dtype=np.bool_)  # dom[i, j]: i dominates j
+    n = np.zeros(N, dtype=np.int64)         # number of designs dominating j
+    for i in range(N):
+        for j in range(N):
+            if (i != j and objs[i, 0] <= objs[j, 0] and objs[i, 1] <= objs[j, 1] and objs[i, 2] <= objs[j, 2]
+                    and (objs[i, 0] < objs[j, 0] or objs[i, 1] < objs[j, 1] or objs[i, 2] < objs[j, 2])):
+                dom[i, j] = True
+                n[j] += 1
+    rank = np.full(N, -1, dtype=np.int64)
+    assigned = 0
+    for i in range(N):
+        if n[i] == 0:
+            rank[i] = 0
+            assigned += 1
+    r = 0
+    while assigned < N:
+        for i in range(N):
+            if rank[i] == r:
+                for j in range(N):
+                    if dom[i, j]:
+                        n[j] -= 1
+        r += 1
+        for j in range(N):
+            if rank[j] < 0 and n[j] == 0:
+                rank[j] = r
+                assigned += 1
+    return rank
 
-def mutate(ind, rng, p=0.2):
-    for k, (lo, hi) in {'cell_d':(1.5e-3,6e-3),'strut_t':(0.3e-3,1.2e-3),'porosity':(0.3,0.7)}.items():
-        if rng.random()<p:
-            ind[k] = rng.uniform(lo, hi)
-    return ind
+_rank_fronts_njit = numba.njit(cache=True)(_rank_fronts) if numba is not None else None
 
-def dominates(a,b):
-    better_or_eq = (a['pressure_proxy'] <= b['pressure_proxy'] and a['inv_surface_density'] <= b['inv_surface_density'] and a['neg_stiffness_index'] <= b['neg_stiffness_index'])
-    strictly_better = (a['pressure_proxy'] < b['pressure_proxy'] or a['inv_surface_density'] < b['inv_surface_density'] or a['neg_stiffness_index'] < b['neg_stiffness_index'])
-    return better_or_eq and strictly_better
+def _rank_fronts_numpy(objs):
+    """NumPy fallback for _rank_fronts: an (N,N) dominance matrix, peeled one front at a time."""
+    dom = ((objs[:, None, :] <= objs[None, :, :]).all(axis=-1)
+           & (objs[:, None, :] < objs[None, :, :]).any(axis=-1))
+    n = dom.sum(axis=0)
+    rank = np.full(len(objs), -1, dtype=np.int64)
+    current = n == 0
+    r = 0
+    while current.any():
+        rank[current] = r
+        n = n - dom[current].sum(axis=0)
+        current = (n == 0) & (rank < 0)
+        r += 1
+    return rank
 
 def fast_non_dominated(pop):
-    N=len(pop)
-    S=[[] for _ in range(N)]
-    n=[0]*N
-    fronts=[]
-    for i,p in enumerate(pop):
-        for j,q in enumerate(pop):
-            if i==j: continue
-            if dominates(p,q):
-                S[i].append(j)
-            elif dominates(q,p):
-                n[i]+=1
-        if n[i]==0:
-            p['rank']=0
-    current=[i for i in range(N) if n[i]==0]
-    rank=0
-    while current:
-        front=[pop[i] for i in current]
-        fronts.append(front)
-        next_indices=[]
-        for i_idx in current:
-            for q_idx in S[i_idx]:
-                n[q_idx]-=1
-                if n[q_idx]==0:
-                    pop[q_idx]['rank']=rank+1
-                    next_indices.append(q_idx)
-        current=next_indices
-        rank+=1
-    return fronts
+    """Set pop.rank and return the fronts as index arrays, best first."""
+    objs = np.ascontiguousarray(pop.objectives(), dtype=np.float64)
+    pop.rank = (_rank_fronts_njit or _rank_fronts_numpy)(objs)
+    return [np.flatnonzero(pop.rank == r) for r in range(pop.rank.max(initial=-1) + 1)]
+
+def crowding(pop, front):
+    """Write crowding distances for the `front` indices into pop.crowd.
 
-def crowding(front):
-    for p in front:
-        p['crowd']=0.0
-    for key in ['pressure_proxy','inv_surface_density','neg_stiffness_index']:
-        front.sort(key=lambda x:x[key])
-        front[0]['crowd']=front[-1]['crowd']=float('inf')
-        vals=[f[key] for f in front]
-        vmin,vmax=min(vals),max(vals)
+    Returns `front` in the order left by the last objective sort, which later tie-breaks use.
+    """
+    if pop.crowd is None:
+        pop.crowd = np.zeros(len(pop))
+    pop.crowd[front] = 0.0
+    for key in OBJECTIVES:
+        front = front[np.argsort(getattr(pop, key)[front], kind='stable')]
+        pop.crowd[front[[0, -1]]] = np.inf
+        vals = getattr(pop, key)[front]
+        vmin, vmax = vals[0], vals[-1]
         if vmax==vmin: continue
-        for i in range(1,len(front)-1):
-            front[i]['crowd'] += (vals[i+1]-vals[i-1])/(vmax-vmin)
+        pop.crowd[front[1:-1]] += (vals[2:] - vals[:-2]) / (vmax - vmin)
     return front
 
 def select(pop, rng, size):
-    chosen=[]
-    while len(chosen)<size:
-        a,b=rng.sample(pop,2)
-        # Tournament by rank then crowding
-        if (a['rank']<b['rank']) or (a['rank']==b['rank'] and a['crowd']>b['crowd']):
-            chosen.append(a)
-        else:
-            chosen.append(b)
-    return chosen
+    """Binary tournaments by rank then crowding; returns the chosen indices."""
+    N=len(pop)
+    a=rng.integers(0, N, size)
+    b=(a + rng.integers(1, N, size)) % N  # opponent distinct from a
+    a_wins=(pop.rank[a]<pop.rank[b]) | ((pop.rank[a]==pop.rank[b]) & (pop.crowd[a]>pop.crowd[b]))
+    return np.where(a_wins, a, b)
 
 def main():
     ap=argparse.ArgumentParser()
@@ -199,41 +250,41 @@ def main():
     ap.add_argument('--ref_inv_surface', type=float, default=None, help='Override reference point inv surface objective')
     ap.add_argument('--ref_neg_stiffness', type=float, default=None, help='Override reference point neg stiffness objective')
     args=ap.parse_args()
-    rng=random.Random(args.seed)
-    pop=[evaluate(random_ind(rng)) for _ in range(args.pop)]
+    rng=np.random.default_rng(args.seed)
+    pop=evaluate_pop(random_pop(args.pop, rng))
+    for f in fast_non_dominated(pop):
+        crowding(pop, f)
     for g in range(args.gens):
-        fronts=fast_non_dominated(pop)
-        for f in fronts:
-            crowding(f)
-        parents=select(pop, rng, args.pop)
-        children=[]
-        for i in range(0,args.pop,2):
-            a=parents[i]; b=parents[min(i+1,args.pop-1)]
-            c1=mutate(evaluate(sbx_crossover(a,b,rng)), rng)
-            c2=mutate(evaluate(sbx_crossover(b,a,rng)), rng)
-            children.append(c1); children.append(c2)
-        pop=parents+children
+        parents=pop.take(select(pop, rng, args.pop))
+        # Consecutive parents pair up; each pair yields one child per parent ordering
+        ia=np.arange(0, args.pop, 2); ib=np.minimum(ia+1, args.pop-1)
+        first=np.column_stack([ia, ib]).ravel(); second=np.column_stack([ib, ia]).ravel()
+        rows=parents.params()
+        children=evaluate_pop(Population(*mutate(sbx_crossover(rows[first], rows[second], rng), rng).T))
+        pop=Population.concat(parents, children)
         # Environmental selection
-        new_pop=[]
+        survivors=[]; n_kept=0; n_cut=0
         fronts=fast_non_dominated(pop)
         for f in fronts:
-            crowding(f)
-            if len(new_pop)+len(f) <= args.pop:
-                new_pop.extend(f)
+            f=crowding(pop, f)
+            if n_kept+len(f) <= args.pop:
+                survivors.append(f); n_kept+=len(f)
             else:
-                f.sort(key=lambda x:(x['rank'],-x['crowd']))
-                needed=args.pop-len(new_pop)
-                new_pop.extend(f[:needed])
+                f=f[np.argsort(-pop.crowd[f], kind='stable')]
+                n_cut=args.pop-n_kept
+                survivors.append(f[:n_cut])
                 break
-        pop=new_pop
+        pop=pop.take(np.concatenate(survivors))
+        # Truncation leaves the survivors' ranks unchanged, so the next generation reuses them;
+        # only the cut front's crowding distances change
+        if n_cut:
+            crowding(pop, np.arange(len(pop)-n_cut, len(pop)))
         if args.verbose and g%10==0:
-            print(f'Gen {g} | Front0 size={len([p for p in pop if p.get("rank",99)==0])}')
-    final_front=[p for p in pop if p.get('rank',99)==0]
+            print(f'Gen {g} | Front0 size={np.count_nonzero(pop.rank==0)}')
+    final_front=pop.take(pop.rank==0)
     fig1=plot_front(final_front, args.fig_dir)
     # Determine reference point (worst objectives * 1.05) unless overridden
-    p_worst=max(d['pressure_proxy'] for d in final_front)
-    s_worst=max(d['inv_surface_density'] for d in final_front)
-    n_worst=max(d['neg_stiffness_index'] for d in final_front)
+    p_worst, s_worst, n_worst = final_front.objectives().max(axis=0).tolist()
     ref_point=(
         args.ref_pressure if args.ref_pressure is not None else p_worst*1.05,
         args.ref_inv_surface if args.ref_inv_surface is not None else s_worst*1.05,
@@ -245,7 +296,7 @@ def main():
     md['metrics']['hypervolume_mc']=hv_est
     md['metrics']['hypervolume_ref_point']={'pressure':ref_point[0],'inv_surface':ref_point[1],'neg_stiffness':ref_point[2]}
     # Legacy proxy retained for trend continuity
-    hv_proxy=sum(1.0/(1.0+p['crowd'] if p['crowd']!=float('inf') else 1.0) for p in final_front)
+    hv_proxy=sum(1.0/(1.0+c if c!=float('inf') else 1.0) for c in final_front.crowd.tolist())
     md['metrics']['hypervolume_proxy']=hv_proxy
     register_figure(md, fig1)
     out=save_results(md, args.output_dir)
@@ -203,7 +203,8 @@ def validate_laminar_assumption(df, export_path: str | None = None):
     else:
         print("All configurations are laminar - analysis is valid")
 
-if __name__ == "__main__":
+def main():
+    """Run complete pressure drop analysis"""
     # Run complete analysis
     df = lattice_flow_analysis()
     
@@ -224,3 +225,6 @@ if __name__ == "__main__":
     # Export results
     df.to_csv('lattice_flow_analysis.csv', index=False)
     print(f"\nResults saved to lattice_flow_analysis.csv")
+
+if __name__ == "__main__":
+    main()
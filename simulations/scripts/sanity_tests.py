@@ -2,7 +2,7 @@
 Run: python simulations/scripts/sanity_tests.py
 """
 from __future__ import annotations
-import json, glob, os, subprocess, sys, math
+import json, glob, os, subprocess, sys, math, tempfile
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..'))
 RES_DIR = os.path.join(ROOT,'simulations','results')
@@ -39,6 +39,14 @@ if hc:
     except Exception as e:
         failures.append(f'HT-CONJ ratio calc error {e}')
 
+# Heat conjugate bf16 smoke run (default snapshots exercise the field plot)
+with tempfile.TemporaryDirectory() as tmp:
+    cmd = [sys.executable, os.path.join(SCRIPT_DIR, 'conjugate_heat.py'), '--dtype', 'bf16', '--device', 'cpu',
+           '--diameters', '2', '--grid', '32', '--steps', '20', '--output_dir', tmp, '--fig_dir', tmp]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        failures.append('HT-CONJ bf16 run failed: ' + (proc.stderr.strip().splitlines() or ['no output'])[-1])
+
 # Energy Monte Carlo P50
 mc = load('SIM-EN-MC')
 if mc: